@@ -1,9 +1,235 @@
 import tkinter as tk
 from tkinter import ttk
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import math
+import queue
+import threading
+import time
+from functools import lru_cache
+
+SWEEP_GRID = (0.1, 1.0, 100)  # (start, stop, points) of every slider axis in a full sweep
+SWEEP_RESOLUTIONS = (25, 50, 100, 150)  # Grid points per axis offered in the UI
+SWEEP_ZOOM = 0.2  # Width of every axis in a zoomed sweep
+SWEEP_SNAP = 0.05  # Zoomed windows start on multiples of this, so nearby views share cached sweeps
+
+def simulate_user_steps(precision, curiosity, prediction, steps=100):
+    """Yield the (VFE, EFE) pair of every time step of the user simulation."""
+    precision_effect = -math.log(precision + 1e-6)
+    for t in range(1, steps + 1):
+        exploration = curiosity * math.exp(-t / 20)
+        prediction_effect = prediction * (1 - math.exp(-t / 10))
+
+        vfe = precision_effect + exploration - prediction_effect
+        efe = exploration * prediction_effect - precision_effect
+        yield vfe, efe
+
+def format_results(precision, curiosity, prediction, vfe_values, efe_values):
+    return (
+        f"Precision: {precision:.2f}\n"
+        f"Curiosity: {curiosity:.2f}\n"
+        f"Prediction: {prediction:.2f}\n"
+        f"Final VFE: {vfe_values[-1]:.2f}\n"
+        f"Final EFE: {efe_values[-1]:.2f}\n"
+    )
+
+def sweep_user_landscape(precisions, curiosities, predictions, steps=100):
+    """Final and time-averaged VFE/EFE of simulate_user over a 3-D parameter grid.
+
+    One vectorized pass over time collects the time factors of the model, which
+    then combine with the (precision, curiosity, prediction) grid by broadcasting.
+    Arrays are indexed [precision, curiosity, prediction].
+    """
+    t = np.arange(1, steps + 1)
+    exploration = np.exp(-t / 20)
+    prediction_effect = 1 - np.exp(-t / 10)
+    interaction = exploration * prediction_effect
+
+    precision = -np.log(np.asarray(precisions)[:, None, None] + 1e-6)
+    curiosity = np.asarray(curiosities)[None, :, None]
+    prediction = np.asarray(predictions)[None, None, :]
+    return {
+        "final_vfe": precision + curiosity * exploration[-1] - prediction * prediction_effect[-1],
+        "final_efe": curiosity * prediction * interaction[-1] - precision,
+        "mean_vfe": precision + curiosity * exploration.mean() - prediction * prediction_effect.mean(),
+        "mean_efe": curiosity * prediction * interaction.mean() - precision,
+    }
+
+@lru_cache(maxsize=8)
+def _sweep_on_grids(precision_grid, curiosity_grid, prediction_grid, steps):
+    axes = tuple(np.linspace(*grid) for grid in (precision_grid, curiosity_grid, prediction_grid))
+    results = dict(sweep_user_landscape(*axes, steps=steps), axes=axes)
+    # Cached arrays are shared by every caller
+    for array in (*axes, *(results[key] for key in results if key != "axes")):
+        array.setflags(write=False)
+    return results
+
+def sweep_grid(points=SWEEP_GRID[2], center=None, zoom=SWEEP_ZOOM):
+    """(start, stop, points) of one axis: the full slider range, or a snapped window of width zoom around center."""
+    low, high = SWEEP_GRID[:2]
+    if center is None:
+        return (low, high, points)
+    start = min(max(round((center - zoom / 2) / SWEEP_SNAP) * SWEEP_SNAP, low), high - zoom)
+    return (round(start, 6), round(start + zoom, 6), points)
+
+def cached_sweep(precision_grid, curiosity_grid, prediction_grid, steps=100):
+    """Sweep over np.linspace grids given as (start, stop, points) tuples, cached by parameter tuple.
+
+    Every call gets its own dict; the arrays are cached and read-only.
+    """
+    return dict(_sweep_on_grids(precision_grid, curiosity_grid, prediction_grid, steps))
+
+class SimulationWorker:
+    """Runs user simulations on a background thread and streams partial results through a queue.
+
+    Messages are (run_id, "partial", vfe_chunk, efe_chunk) and (run_id, "done", results, None).
+    Starting a new run cancels the one in flight; stale messages carry an old run_id.
+    """
+
+    def __init__(self, chunk_size=10):
+        self.chunk_size = chunk_size
+        self.results = queue.Queue()
+        self.run_id = 0
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self, precision, curiosity, prediction, steps=100):
+        self.cancel()
+        self.run_id += 1
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(self.run_id, self._cancel, precision, curiosity, prediction, steps),
+            daemon=True,
+        )
+        self._thread.start()
+        return self.run_id
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self, run_id, cancel, precision, curiosity, prediction, steps):
+        vfe_values, efe_values = [], []
+        vfe_chunk, efe_chunk = [], []
+        for vfe, efe in simulate_user_steps(precision, curiosity, prediction, steps):
+            if cancel.is_set():
+                return
+            vfe_chunk.append(vfe)
+            efe_chunk.append(efe)
+            if len(vfe_chunk) == self.chunk_size:
+                self.results.put((run_id, "partial", vfe_chunk, efe_chunk))
+                vfe_values += vfe_chunk
+                efe_values += efe_chunk
+                vfe_chunk, efe_chunk = [], []
+        if vfe_chunk:
+            self.results.put((run_id, "partial", vfe_chunk, efe_chunk))
+            vfe_values += vfe_chunk
+            efe_values += efe_chunk
+        if not cancel.is_set():
+            results = format_results(precision, curiosity, prediction, vfe_values, efe_values)
+            self.results.put((run_id, "done", results, None))
+
+class SceneModel:
+    """Shapes of the design canvas in compact arrays, with a uniform-grid spatial index.
+
+    Shape i has bounds[i] = (x0, y0, x1, y1) and kinds[i] (SHAPE_RECTANGLE or SHAPE_OVAL).
+    The index maps each grid cell to the shapes overlapping it, so hit-testing only
+    looks at the shapes near the pointer however many shapes the scene holds.
+    """
+
+    SHAPE_RECTANGLE, SHAPE_OVAL = 0, 1
+
+    def __init__(self, cell_size=64, capacity=256):
+        self.cell_size = cell_size
+        self.count = 0
+        self.bounds = np.zeros((capacity, 4))
+        self.cells = np.zeros((capacity, 4), dtype=int)  # Grid cell range (cx0, cy0, cx1, cy1) of each shape
+        self.kinds = np.zeros(capacity, dtype=np.int8)
+        self.item_ids = np.zeros(capacity, dtype=int)
+        self.index_of = {}  # Canvas item id -> shape index
+        self.grid = {}  # (cx, cy) -> set of shape indices
+
+    def _grow(self):
+        capacity = 2 * len(self.bounds)
+        for name in ("bounds", "cells", "kinds", "item_ids"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _cell_range(self, bounds):
+        return np.floor_divide(bounds, self.cell_size).astype(int)
+
+    def _insert(self, i):
+        cx0, cy0, cx1, cy1 = self.cells[i]
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.grid.setdefault((cx, cy), set()).add(i)
+
+    def _remove(self, i):
+        cx0, cy0, cx1, cy1 = self.cells[i]
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self.grid[(cx, cy)].discard(i)
+
+    def add(self, item_id, bounds, kind=SHAPE_RECTANGLE):
+        if self.count == len(self.bounds):
+            self._grow()
+        i = self.count
+        self.count += 1
+        self.bounds[i] = bounds
+        self.cells[i] = self._cell_range(self.bounds[i])
+        self.kinds[i] = kind
+        self.item_ids[i] = item_id
+        self.index_of[item_id] = i
+        self._insert(i)
+        return i
+
+    def hit_test(self, x, y):
+        """Canvas item id of the topmost shape under (x, y), or None."""
+        key = (int(x // self.cell_size), int(y // self.cell_size))
+        candidates = np.array(sorted(self.grid.get(key, ())), dtype=int)
+        if len(candidates) == 0:
+            return None
+        x0, y0, x1, y1 = self.bounds[candidates].T
+        inside = (x0 <= x) & (x <= x1) & (y0 <= y) & (y <= y1)
+        # Ovals only count inside the inscribed ellipse
+        rx, ry = np.maximum((x1 - x0) / 2, 1e-9), np.maximum((y1 - y0) / 2, 1e-9)
+        in_ellipse = ((x - (x0 + x1) / 2) / rx) ** 2 + ((y - (y0 + y1) / 2) / ry) ** 2 <= 1
+        inside &= (self.kinds[candidates] != self.SHAPE_OVAL) | in_ellipse
+        hits = candidates[inside]
+        # Shapes added later are drawn on top
+        return int(self.item_ids[hits.max()]) if len(hits) else None
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Canvas item ids of every shape overlapping the rectangle."""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        cx0, cy0, cx1, cy1 = self._cell_range(np.array([x0, y0, x1, y1]))
+        candidates = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                candidates |= self.grid.get((cx, cy), set())
+        candidates = np.array(sorted(candidates), dtype=int)
+        if len(candidates) == 0:
+            return []
+        b = self.bounds[candidates]
+        overlap = (b[:, 0] <= x1) & (b[:, 2] >= x0) & (b[:, 1] <= y1) & (b[:, 3] >= y0)
+        return self.item_ids[candidates[overlap]].tolist()
+
+    def move(self, item_ids, dx, dy):
+        """Shift the bounds of a group of shapes; the index is refreshed by reindex()."""
+        indices = [self.index_of[item_id] for item_id in item_ids]
+        self.bounds[indices] += (dx, dy, dx, dy)
+
+    def reindex(self, item_ids):
+        """Move shapes to the grid cells of their current bounds."""
+        for item_id in item_ids:
+            i = self.index_of[item_id]
+            cells = self._cell_range(self.bounds[i])
+            if np.any(cells != self.cells[i]):
+                self._remove(i)
+                self.cells[i] = cells
+                self._insert(i)
 
 class ActiveInferenceUI:
     def __init__(self, root):
@@ -15,6 +241,22 @@ class ActiveInferenceUI:
         self.root.columnconfigure([0, 1], weight=1)
         self.root.rowconfigure([0, 1, 2], weight=1)
 
+        # Background simulation state
+        self.worker = SimulationWorker()
+        self.active_run = None
+        self.polling = False
+        self.streamed_series = {"VFE": [], "EFE": []}
+        self.poll_interval = 50  # Milliseconds between polls of the worker queue
+        self.viewer_mode = "series"  # "series" for time series, "sweep" for sweep heatmaps, "live" for blitted lines
+        self.sweep_results = None
+
+        # Live mode: throttled re-simulation drawn by blitting persistent lines
+        self.live_interval = 30  # Minimum milliseconds between re-simulations while a slider moves
+        self.live_job = None
+        self.live_last = 0.0  # time.perf_counter() of the last live update
+        self.live_lines = None
+        self.live_backgrounds = None
+
         # Interface Design Section
         self.design_frame = ttk.LabelFrame(root, text="Graphical Interface Design", padding=10)
         self.design_frame.grid(row=0, column=0, rowspan=3, padx=10, pady=10, sticky="nsew")
@@ -42,7 +284,11 @@ class ActiveInferenceUI:
         self.viewer_frame = ttk.LabelFrame(root, text="Simulation Viewer", padding=10)
         self.viewer_frame.grid(row=1, column=1, padx=10, pady=10, sticky="nsew")
 
-        self.figure = plt.Figure(figsize=(4, 3), dpi=100)
+        # matplotlib is only needed once the UI is built, so the module imports without it
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.figure = Figure(figsize=(4, 3), dpi=100)
         self.ax_vfe = self.figure.add_subplot(211)
         self.ax_efe = self.figure.add_subplot(212)
         self.ax_vfe.set_title("VFE Over Time")
@@ -54,12 +300,30 @@ class ActiveInferenceUI:
 
         self.figure_canvas = FigureCanvasTkAgg(self.figure, self.viewer_frame)
         self.figure_canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.figure_canvas.mpl_connect("draw_event", self.on_figure_draw)
 
         # Simulation Output Section
         self.output_frame = ttk.LabelFrame(root, text="Simulation Output", padding=10)
         self.output_frame.grid(row=2, column=1, padx=10, pady=10, sticky="nsew")
 
-        ttk.Button(self.output_frame, text="Run Simulation", command=self.run_simulation).pack(pady=10)
+        self.run_controls = ttk.Frame(self.output_frame)
+        self.run_controls.pack(pady=10)
+        ttk.Button(self.run_controls, text="Run Simulation", command=self.run_simulation).pack(side="left", padx=5)
+        ttk.Button(self.run_controls, text="Cancel", command=self.cancel_simulation).pack(side="left", padx=5)
+        ttk.Button(self.run_controls, text="Parameter Sweep", command=self.run_sweep).pack(side="left", padx=5)
+        self.background_mode = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.run_controls, text="Run in Background", variable=self.background_mode).pack(side="left", padx=5)
+        self.live_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.run_controls, text="Live Update", variable=self.live_mode, command=self.on_live_mode_toggled).pack(side="left", padx=5)
+
+        # Sweep grid: resolution per axis, over the full slider range or zoomed around the sliders
+        self.sweep_controls = ttk.Frame(self.output_frame)
+        self.sweep_controls.pack()
+        ttk.Label(self.sweep_controls, text="Sweep Points").pack(side="left", padx=5)
+        self.sweep_points = tk.IntVar(value=SWEEP_GRID[2])
+        ttk.Spinbox(self.sweep_controls, values=SWEEP_RESOLUTIONS, textvariable=self.sweep_points, width=5, state="readonly").pack(side="left", padx=5)
+        self.sweep_zoom = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.sweep_controls, text="Zoom to Sliders", variable=self.sweep_zoom).pack(side="left", padx=5)
 
         self.output_text = tk.Text(self.output_frame, height=10, wrap="word", bg="#f1f1f1", bd=0, highlightthickness=1, highlightbackground="#d3d3d3")
         self.output_text.pack(fill="both", expand=True, padx=10, pady=10)
@@ -68,16 +332,27 @@ class ActiveInferenceUI:
         self.offset_x = 0
         self.offset_y = 0
 
+        # Scene model: one set of canvas bindings, hit-testing through the spatial index
+        self.scene = SceneModel()
+        self.selection = set()
+        self.dragging = False
+        self.rubber_band = None
+        self.canvas.bind("<Button-1>", self.start_drag)
+        self.canvas.bind("<Shift-Button-1>", self.toggle_selection)
+        self.canvas.bind("<B1-Motion>", self.drag_shape)
+        self.canvas.bind("<ButtonRelease-1>", self.end_drag)
+
     def create_slider(self, frame, label, row):
         ttk.Label(frame, text=label).grid(row=row, column=0, padx=5, pady=5, sticky="w")
-        slider = ttk.Scale(frame, from_=0.1, to=1.0, orient="horizontal")
+        slider = ttk.Scale(frame, from_=0.1, to=1.0, orient="horizontal", command=self.on_parameters_changed)
         slider.grid(row=row, column=1, padx=5, pady=5, sticky="ew")
         return slider
 
     def add_shape(self, create_func, *coords, **kwargs):
         shape = create_func(*coords, **kwargs)
-        self.canvas.tag_bind(shape, "<Button-1>", self.start_drag)
-        self.canvas.tag_bind(shape, "<B1-Motion>", self.drag_shape)
+        kind = SceneModel.SHAPE_OVAL if create_func == self.canvas.create_oval else SceneModel.SHAPE_RECTANGLE
+        self.scene.add(shape, coords, kind)
+        return shape
 
     def add_button(self):
         self.add_shape(self.canvas.create_rectangle, 50, 50, 150, 100, fill="#add8e6", tags="button")
@@ -91,50 +366,242 @@ class ActiveInferenceUI:
     def add_rectangle(self):
         self.add_shape(self.canvas.create_rectangle, 500, 200, 650, 300, fill="#ffa07a", tags="rectangle")
 
+    def set_selection(self, shapes):
+        # Selected shapes carry the "selected" tag, so a group is styled and moved with one call
+        self.canvas.itemconfigure("selected", outline="black", width=1)
+        self.canvas.dtag("selected", "selected")
+        self.selection = set(shapes)
+        for shape in self.selection:
+            self.canvas.addtag_withtag("selected", shape)
+        self.canvas.itemconfigure("selected", outline="#1e90ff", width=2)
+
     def start_drag(self, event):
-        self.offset_x, self.offset_y = event.x, event.y
-        self.selected_shape = self.canvas.find_withtag("current")[0]
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        self.offset_x, self.offset_y = x, y
+        self.selected_shape = self.scene.hit_test(x, y)
+        if self.selected_shape is None:
+            # Empty space: rubber-band selection
+            self.set_selection([])
+            self.rubber_band = self.canvas.create_rectangle(x, y, x, y, outline="#1e90ff", dash=(4, 2))
+            return
+        if self.selected_shape not in self.selection:
+            self.set_selection([self.selected_shape])
+        self.dragging = True
+
+    def toggle_selection(self, event):
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        shape = self.scene.hit_test(x, y)
+        if shape is not None:
+            self.set_selection(self.selection ^ {shape})
 
     def drag_shape(self, event):
-        dx, dy = event.x - self.offset_x, event.y - self.offset_y
-        self.offset_x, self.offset_y = event.x, event.y
-        self.canvas.move(self.selected_shape, dx, dy)
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        if self.rubber_band is not None:
+            self.canvas.coords(self.rubber_band, self.offset_x, self.offset_y, x, y)
+            return
+        if not self.dragging:
+            return
+        dx, dy = x - self.offset_x, y - self.offset_y
+        self.offset_x, self.offset_y = x, y
+        self.canvas.move("selected", dx, dy)
+        self.scene.move(self.selection, dx, dy)
+
+    def end_drag(self, event):
+        if self.rubber_band is not None:
+            self.set_selection(self.scene.query_rect(*self.canvas.coords(self.rubber_band)))
+            self.canvas.delete(self.rubber_band)
+            self.rubber_band = None
+        if self.dragging:
+            self.scene.reindex(self.selection)
+            self.dragging = False
 
     def run_simulation(self):
         precision = self.precision_scale.get()
         curiosity = self.curiosity_scale.get()
         prediction = self.prediction_scale.get()
 
+        if self.background_mode.get():
+            self.start_background_simulation(precision, curiosity, prediction)
+            return
+
         interaction_results, time_series = self.simulate_user(precision, curiosity, prediction)
 
         self.output_text.delete("1.0", tk.END)
         self.output_text.insert(tk.END, interaction_results)
         self.update_simulation_viewer(time_series)
 
+    def start_background_simulation(self, precision, curiosity, prediction):
+        self.active_run = self.worker.start(precision, curiosity, prediction)
+        self.streamed_series = {"VFE": [], "EFE": []}
+        self.output_text.delete("1.0", tk.END)
+        self.output_text.insert(tk.END, "Running simulation...\n")
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_interval, self.poll_simulation)
+
+    def cancel_simulation(self):
+        if self.active_run is not None:
+            self.worker.cancel()
+            self.active_run = None
+            self.output_text.insert(tk.END, "Simulation cancelled.\n")
+
+    def on_parameters_changed(self, value=None):
+        if self.live_mode.get():
+            self.schedule_live_update()
+            return
+        if self.viewer_mode == "sweep":
+            self.show_sweep()
+        # Restart an in-flight background run with the new slider values
+        if self.active_run is not None:
+            self.start_background_simulation(
+                self.precision_scale.get(), self.curiosity_scale.get(), self.prediction_scale.get()
+            )
+
+    def poll_simulation(self):
+        run_id = self.active_run
+        if run_id is None:
+            self.polling = False
+            return
+        updated, finished = False, False
+        while True:
+            try:
+                message_run, kind, payload, extra = self.worker.results.get_nowait()
+            except queue.Empty:
+                break
+            if message_run != run_id:
+                continue  # Stale message from a cancelled run
+            if kind == "partial":
+                self.streamed_series["VFE"] += payload
+                self.streamed_series["EFE"] += extra
+                updated = True
+            elif kind == "done":
+                self.output_text.delete("1.0", tk.END)
+                self.output_text.insert(tk.END, payload)
+                finished = True
+
+        if updated or finished:
+            self.update_simulation_viewer(self.streamed_series)
+        if finished:
+            self.active_run = None
+            self.polling = False
+        else:
+            self.root.after(self.poll_interval, self.poll_simulation)
+
     def simulate_user(self, precision, curiosity, prediction):
         vfe_values, efe_values = [], []
-        for t in range(1, 101):
-            exploration = curiosity * math.exp(-t / 20)
-            prediction_effect = prediction * (1 - math.exp(-t / 10))
-            precision_effect = -math.log(precision + 1e-6)
-
-            vfe = precision_effect + exploration - prediction_effect
-            efe = exploration * prediction_effect - precision_effect
-
+        for vfe, efe in simulate_user_steps(precision, curiosity, prediction):
             vfe_values.append(vfe)
             efe_values.append(efe)
 
         time_series = {"VFE": vfe_values, "EFE": efe_values}
-        results = (
-            f"Precision: {precision:.2f}\n"
-            f"Curiosity: {curiosity:.2f}\n"
-            f"Prediction: {prediction:.2f}\n"
-            f"Final VFE: {vfe_values[-1]:.2f}\n"
-            f"Final EFE: {efe_values[-1]:.2f}\n"
-        )
+        results = format_results(precision, curiosity, prediction, vfe_values, efe_values)
         return results, time_series
 
+    def run_sweep(self):
+        points = self.sweep_points.get()
+        sliders = (self.precision_scale, self.curiosity_scale, self.prediction_scale)
+        grids = [sweep_grid(points, slider.get() if self.sweep_zoom.get() else None) for slider in sliders]
+        self.sweep_results = cached_sweep(*grids)
+        final_vfe, final_efe = self.sweep_results["final_vfe"], self.sweep_results["final_efe"]
+        precisions, curiosities, predictions = self.sweep_results["axes"]
+        best = np.unravel_index(np.argmin(final_vfe), final_vfe.shape)
+
+        self.output_text.delete("1.0", tk.END)
+        self.output_text.insert(tk.END, (
+            f"Sweep: {final_vfe.size} parameter combinations\n"
+            f"Final VFE range: {final_vfe.min():.2f} to {final_vfe.max():.2f}\n"
+            f"Final EFE range: {final_efe.min():.2f} to {final_efe.max():.2f}\n"
+            f"Lowest final VFE at precision {precisions[best[0]]:.2f}, "
+            f"curiosity {curiosities[best[1]]:.2f}, prediction {predictions[best[2]]:.2f}\n"
+            f"Cached sweeps: {_sweep_on_grids.cache_info().currsize}\n"
+        ))
+        self.viewer_mode = "sweep"
+        self.show_sweep()
+
+    def show_sweep(self):
+        # Heatmaps over (precision, curiosity) at the grid slice nearest to the prediction slider
+        precisions, curiosities, predictions = self.sweep_results["axes"]
+        k = int(np.argmin(np.abs(predictions - self.prediction_scale.get())))
+        extent = [precisions[0], precisions[-1], curiosities[0], curiosities[-1]]
+
+        for ax, key, label in ((self.ax_vfe, "final_vfe", "VFE"), (self.ax_efe, "final_efe", "EFE")):
+            ax.clear()
+            ax.imshow(self.sweep_results[key][:, :, k].T, origin="lower", extent=extent, aspect="auto", cmap="viridis")
+            ax.plot(self.precision_scale.get(), self.curiosity_scale.get(), "w+", markersize=10)
+            ax.set_title(f"Final {label} (Prediction {predictions[k]:.2f})")
+            ax.set_xlabel("Precision")
+            ax.set_ylabel("Curiosity")
+
+        self.figure_canvas.draw()
+
+    def on_live_mode_toggled(self):
+        if self.live_mode.get():
+            self.cancel_simulation()
+            self.schedule_live_update()
+
+    def schedule_live_update(self):
+        # Throttle: update at once if the last update is an interval old, else once the interval
+        # has passed; a pending update reads the sliders when it runs, so the last value is drawn
+        if self.live_job is not None:
+            return
+        wait = self.live_interval - (time.perf_counter() - self.live_last) * 1000
+        if wait <= 0:
+            self.live_update()
+        else:
+            self.live_job = self.root.after(int(wait) + 1, self.live_update)
+
+    def live_update(self):
+        self.live_job = None
+        self.live_last = time.perf_counter()
+        precision = self.precision_scale.get()
+        curiosity = self.curiosity_scale.get()
+        prediction = self.prediction_scale.get()
+        interaction_results, time_series = self.simulate_user(precision, curiosity, prediction)
+
+        self.output_text.delete("1.0", tk.END)
+        self.output_text.insert(tk.END, interaction_results)
+        if self.viewer_mode != "live":
+            self.setup_live_plot(len(time_series["VFE"]))
+        self.live_lines[0].set_ydata(time_series["VFE"])
+        self.live_lines[1].set_ydata(time_series["EFE"])
+        self.blit_live_lines()
+
+    def setup_live_plot(self, steps):
+        # Fixed limits from the slider corners: every step of the model is monotone in each parameter
+        corners = [self.simulate_user(p, c, r)[1] for p in (0.1, 1.0) for c in (0.1, 1.0) for r in (0.1, 1.0)]
+        self.ax_vfe.clear()
+        self.ax_efe.clear()
+        self.live_lines = []
+        for ax, key, color in ((self.ax_vfe, "VFE", "blue"), (self.ax_efe, "EFE", "green")):
+            low = min(min(series[key]) for series in corners)
+            high = max(max(series[key]) for series in corners)
+            margin = 0.05 * (high - low)
+            ax.set_xlim(0, steps - 1)
+            ax.set_ylim(low - margin, high + margin)
+            (line,) = ax.plot(range(steps), [0] * steps, label=key, color=color, linewidth=2, animated=True)
+            self.live_lines.append(line)
+            ax.set_title(f"{key} Over Time")
+            ax.set_xlabel("Time")
+            ax.set_ylabel(key)
+            ax.legend()
+        self.viewer_mode = "live"
+        # A full draw renders the static parts; on_figure_draw then captures the backgrounds
+        self.figure_canvas.draw()
+
+    def on_figure_draw(self, event):
+        if self.viewer_mode == "live":
+            self.live_backgrounds = [self.figure_canvas.copy_from_bbox(ax.bbox) for ax in (self.ax_vfe, self.ax_efe)]
+            for ax, line in zip((self.ax_vfe, self.ax_efe), self.live_lines):
+                ax.draw_artist(line)
+
+    def blit_live_lines(self):
+        for ax, line, background in zip((self.ax_vfe, self.ax_efe), self.live_lines, self.live_backgrounds):
+            self.figure_canvas.restore_region(background)
+            ax.draw_artist(line)
+            self.figure_canvas.blit(ax.bbox)
+
     def update_simulation_viewer(self, time_series):
+        self.viewer_mode = "series"
         self.ax_vfe.clear()
         self.ax_efe.clear()
 
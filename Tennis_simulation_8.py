@@ -1,5 +1,10 @@
 import numpy as np
-import matplotlib.pyplot as plt
+
+from categorical_sampler import sample_index
+from kernels import get_kernels
+from tennis_batch import simulate_matches
+from tennis_planning import exact_multi_step_planning
+from tennis_tables import build_model_tables
 
 # Parameters for the simulation
 NUM_SETS = 3
@@ -35,8 +40,9 @@ def update_observation_likelihoods(match_progress, player_state):
     return normalized_probs
 
 # State Transition probabilities
-def state_transition(current_state, action, fatigue, opponent_action, match_context):
+def state_transition(current_state, action, fatigue, opponent_action, match_context, rng=None):
     """Define state transitions based on current state, action, fatigue level, opponent influence, and match context."""
+    rng = np.random if rng is None else rng
     base_probs = {
         "aggressive": [0.5, 0.2, 0.1, 0.1, 0.1],
         "defensive": [0.2, 0.5, 0.2, 0.1, 0.0],
@@ -49,7 +55,7 @@ def state_transition(current_state, action, fatigue, opponent_action, match_cont
     probs = np.array(base_probs[current_state])
     adjusted_probs = probs * (1 - fatigue) + interaction_factor * fatigue / len(probs) + context_factor
     adjusted_probs /= np.sum(adjusted_probs)  # Normalize probabilities
-    return np.random.choice(hidden_states, p=adjusted_probs)
+    return hidden_states[sample_index(adjusted_probs, rng.random())]
 
 # Fatigue Adaptation
 def update_fatigue(fatigue, action, match_context):
@@ -62,11 +68,12 @@ def update_fatigue(fatigue, action, match_context):
     return min(1.0, fatigue + fatigue_increase)
 
 # Observation Likelihoods
-def generate_observation(state, observation_likelihood):
+def generate_observation(state, observation_likelihood, rng=None):
     """Generate observations based on the hidden state and dynamic observation likelihoods."""
+    rng = np.random if rng is None else rng
     probs = observation_likelihood[state]
     probs = np.array(probs) / np.sum(probs)  # Normalize probabilities
-    return np.random.choice(observations, p=probs)
+    return observations[sample_index(probs, rng.random())]
 
 # Variational Free Energy update
 def compute_vfe(beliefs, observation, observation_likelihood):
@@ -86,106 +93,84 @@ def compute_efe(beliefs, observation_likelihood, preferences):
     return efe
 
 # Joint Multi-Step Planning
-def multi_step_planning(beliefs, opponent_beliefs, observation_likelihood, preferences, horizon=3):
-    """Plan actions over multiple steps to optimize long-term outcomes, considering opponent strategy."""
-    best_action = None
-    best_expected_vfe = float('inf')
-
-    for action in actions:
-        cumulative_vfe = 0
-        simulated_beliefs = beliefs.copy()
-        simulated_opponent_beliefs = opponent_beliefs.copy()
-
-        for _ in range(horizon):
-            # Simulate an observation based on the current belief
-            simulated_observation_probs = np.sum(observation_likelihood * simulated_beliefs[:, None], axis=0)
-            simulated_observation_probs /= np.sum(simulated_observation_probs)  # Normalize probabilities
-            simulated_observation = np.random.choice(observations, p=simulated_observation_probs)
-
-            # Update simulated beliefs using the observation
-            _, simulated_beliefs = compute_vfe(simulated_beliefs, simulated_observation, observation_likelihood)
-
-            # Simulate opponent action and its influence
-            opponent_action = np.random.choice(actions)
-            _, simulated_opponent_beliefs = compute_vfe(simulated_opponent_beliefs, simulated_observation, observation_likelihood)
-
-            # Compute EFE as the sum of simulated beliefs weighted by preferences over observations
-            efe = compute_efe(simulated_beliefs, observation_likelihood, preferences)
-            cumulative_vfe += efe
-
-        if cumulative_vfe < best_expected_vfe:
-            best_expected_vfe = cumulative_vfe
-            best_action = action
-
-    return best_action
-
-# Initialize variables
-player1_beliefs = np.array([1 / len(hidden_states)] * len(hidden_states))  # Uniform prior
-player2_beliefs = np.array([1 / len(hidden_states)] * len(hidden_states))
-player1_vfe = []
-player2_vfe = []
-player1_efe = []
-player2_efe = []
-preferences = np.array([0.5, 0.2, 0.2, 0.1])  # Preferences for outcomes
-fatigue_level_player1 = 0.1  # Initial fatigue level for Player 1
-fatigue_level_player2 = 0.1  # Initial fatigue level for Player 2
-
-for point in range(TOTAL_POINTS):
-    # Dynamic observation likelihoods
-    match_progress = point / TOTAL_POINTS
-    dynamic_likelihoods_player1 = update_observation_likelihoods(match_progress, "neutral")
-    dynamic_likelihoods_player2 = update_observation_likelihoods(match_progress, "neutral")
-
-    # Multi-step planning for actions
-    action1 = multi_step_planning(player1_beliefs, player2_beliefs, np.array(list(dynamic_likelihoods_player1.values())), preferences)
-    action2 = multi_step_planning(player2_beliefs, player1_beliefs, np.array(list(dynamic_likelihoods_player2.values())), preferences)
-
-    # State transitions with opponent modeling
-    player1_state = state_transition(np.random.choice(hidden_states), action1, fatigue_level_player1, action2, "normal")
-    player2_state = state_transition(np.random.choice(hidden_states), action2, fatigue_level_player2, action1, "normal")
-
-    # Generate observations
-    obs1 = generate_observation(player1_state, dynamic_likelihoods_player1)
-    obs2 = generate_observation(player2_state, dynamic_likelihoods_player2)
-
-    # Update VFE and beliefs
-    vfe1, player1_beliefs = compute_vfe(player1_beliefs, obs1, np.array(list(dynamic_likelihoods_player1.values())))
-    vfe2, player2_beliefs = compute_vfe(player2_beliefs, obs2, np.array(list(dynamic_likelihoods_player2.values())))
-
-    # Compute EFE
-    efe1 = compute_efe(player1_beliefs, np.array(list(dynamic_likelihoods_player1.values())), preferences)
-    efe2 = compute_efe(player2_beliefs, np.array(list(dynamic_likelihoods_player2.values())), preferences)
-
-    player1_vfe.append(vfe1)
-    player2_vfe.append(vfe2)
-    player1_efe.append(efe1)
-    player2_efe.append(efe2)
-
-    # Update fatigue
-    fatigue_level_player1 = update_fatigue(fatigue_level_player1, action1, "normal")
-    fatigue_level_player2 = update_fatigue(fatigue_level_player2, action2, "normal")
+def multi_step_planning(beliefs, opponent_beliefs, observation_likelihood, preferences, horizon=3, rng=None,
+                        backend=None, planner="sampled", fatigue=0.1, opponent_action=None, match_context="normal"):
+    """Plan actions over multiple steps to optimize long-term outcomes, considering opponent strategy.
+
+    The rollouts run in the planning_rollout kernel of kernels.py; backend picks numpy or numba.
+    The simulated opponent beliefs never influenced the chosen action and are not rolled out.
+    planner "exact" searches the full action x observation tree instead (tennis_planning.py),
+    using fatigue, the opponent's action (None if unknown) and the match context.
+    """
+    if planner == "exact":
+        return exact_multi_step_planning(beliefs, opponent_beliefs, observation_likelihood, preferences, horizon,
+                                         fatigue, opponent_action, match_context)
+    rng = np.random if rng is None else rng
+    # One uniform per simulated observation of every rollout
+    uniforms = rng.random((len(actions), horizon))
+    cumulative_efe = get_kernels(backend)["planning_rollout"](beliefs, observation_likelihood, preferences, uniforms)
+    # argmin keeps the first action on ties
+    return actions[int(np.argmin(cumulative_efe))]
+
+# Match simulation on the precomputed, integer-coded model tables (see tennis_tables.py)
+def simulate_match(total_points=TOTAL_POINTS, preferences=None, initial_fatigue=0.1, horizon=3, rng=None, tables=None,
+                   profiler=None, planner="sampled"):
+    """Simulate one match and return the VFE and EFE of both players at every point.
+
+    profiler -- optional tennis_profiling.PhaseProfiler timing the phases of the point loop
+    planner -- "sampled" rollouts or the "exact" tree search (see tennis_batch.PLANNERS)
+    """
+    if preferences is None:
+        preferences = np.array([0.5, 0.2, 0.2, 0.1])  # Preferences for outcomes
+    if tables is None:
+        tables = build_model_tables(total_points)
+    match = simulate_matches(1, total_points, preferences, initial_fatigue=initial_fatigue, horizon=horizon,
+                             rng=rng, tables=tables, profiler=profiler, planner=planner)
+    return {key: value[0] for key, value in match.items()}
 
 # Visualization
-# Variational Free Energy Plot
-plt.figure(figsize=(12, 6))
-plt.plot(np.linspace(0, TOTAL_POINTS, len(player1_vfe)), np.convolve(player1_vfe, np.ones(10)/10, mode='same'), label="Player 1 VFE (Smoothed)", color="black")
-plt.plot(np.linspace(0, TOTAL_POINTS, len(player2_vfe)), np.convolve(player2_vfe, np.ones(10)/10, mode='same'), label="Player 2 VFE (Smoothed)", color="gray")
-plt.axhline(y=0, color="red", linestyle="--", label="Baseline")
-plt.xlabel("Minute")
-plt.ylabel("Variational Free Energy")
-plt.title("Fluctuations of Variational Free Energy During the Match (Smoothed)")
-plt.legend()
-plt.grid()
-plt.show()
-
-# Expected Free Energy Plot
-plt.figure(figsize=(12, 6))
-plt.plot(np.linspace(0, TOTAL_POINTS, len(player1_efe)), np.convolve(player1_efe, np.ones(10)/10, mode='same'), label="Player 1 EFE (Smoothed)", color="blue")
-plt.plot(np.linspace(0, TOTAL_POINTS, len(player2_efe)), np.convolve(player2_efe, np.ones(10)/10, mode='same'), label="Player 2 EFE (Smoothed)", color="green")
-plt.axhline(y=0, color="red", linestyle="--", label="Baseline")
-plt.xlabel("Minute")
-plt.ylabel("Expected Free Energy")
-plt.title("Fluctuations of Expected Free Energy During the Match (Smoothed)")
-plt.legend()
-plt.grid()
-plt.show()
+def plot_match(match):
+    """Plot smoothed VFE and EFE of both players; matplotlib is only imported here.
+
+    A batch from simulate_matches ((matches, points) arrays) is drawn as the smoothed
+    mean with a 5-95% quantile band per player.
+    """
+    import matplotlib.pyplot as plt
+
+    from plotting import moving_average, plot_band, plot_series
+
+    total_points = np.shape(match["player1_vfe"])[-1]
+    minutes = np.linspace(0, total_points, total_points)
+
+    def plot_player(values, label, color):
+        if np.ndim(values) == 2:
+            plot_band(plt.gca(), minutes, values, window=10, label=f"{label} (Smoothed mean, 5-95%)", color=color)
+        else:
+            plot_series(plt.gca(), minutes, moving_average(values, 10), label=f"{label} (Smoothed)", color=color)
+
+    # Variational Free Energy Plot
+    plt.figure(figsize=(12, 6))
+    plot_player(match["player1_vfe"], "Player 1 VFE", "black")
+    plot_player(match["player2_vfe"], "Player 2 VFE", "gray")
+    plt.axhline(y=0, color="red", linestyle="--", label="Baseline")
+    plt.xlabel("Minute")
+    plt.ylabel("Variational Free Energy")
+    plt.title("Fluctuations of Variational Free Energy During the Match (Smoothed)")
+    plt.legend()
+    plt.grid()
+    plt.show()
+
+    # Expected Free Energy Plot
+    plt.figure(figsize=(12, 6))
+    plot_player(match["player1_efe"], "Player 1 EFE", "blue")
+    plot_player(match["player2_efe"], "Player 2 EFE", "green")
+    plt.axhline(y=0, color="red", linestyle="--", label="Baseline")
+    plt.xlabel("Minute")
+    plt.ylabel("Expected Free Energy")
+    plt.title("Fluctuations of Expected Free Energy During the Match (Smoothed)")
+    plt.legend()
+    plt.grid()
+    plt.show()
+
+if __name__ == "__main__":
+    plot_match(simulate_match())
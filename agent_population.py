@@ -0,0 +1,137 @@
+import numpy as np
+
+from categorical_sampler import sample_rows_from_uniforms
+
+# Tensorized belief filter for populations of agents, generalising the
+# designer/artifact/user loop of Simulation 1.py to any number of agents.
+# All agents are stacked into batched arrays:
+#   transition  (N, S, S, A)  T[n, s, s', a], rows over s' sum to 1
+#   observation (N, O, S)     O[n, o, s], columns over o sum to 1
+#   belief      (N, S)
+# Agents with fewer states, actions or observations are zero-padded to the
+# largest sizes; padded states carry no belief and are never reached.
+
+
+def normalize(P, axis=1):
+    """Normalize P to sum to 1 along axis, leaving all-zero slices at zero."""
+    total = P.sum(axis=axis, keepdims=True)
+    return np.divide(P, total, out=np.zeros_like(P, dtype=float), where=total > 0)
+
+
+def sample_rows(probs, rng=None):
+    """Draw one index per row of an (N, K) probability array."""
+    rng = np.random if rng is None else rng
+    return sample_rows_from_uniforms(probs, rng.random(len(probs)))
+
+
+def stack_agents(agents, rng=None):
+    """Stack a list of agents, each a dict with 'transition' (S, S, A) and 'observation' (O, S), into a population."""
+    rng = np.random if rng is None else rng
+    n_states = np.array([agent["transition"].shape[0] for agent in agents])
+    n_actions = np.array([agent["transition"].shape[2] for agent in agents])
+    n_obs = np.array([agent["observation"].shape[0] for agent in agents])
+    S, A, O = n_states.max(), n_actions.max(), n_obs.max()
+
+    transition = np.zeros((len(agents), S, S, A))
+    observation = np.zeros((len(agents), O, S))
+    for n, agent in enumerate(agents):
+        s, a, o = n_states[n], n_actions[n], n_obs[n]
+        transition[n, :s, :s, :a] = agent["transition"]
+        observation[n, :o, :s] = agent["observation"]
+        # Padded states stay where they are, so padded rows remain valid distributions
+        transition[n, s:, s:, :] = np.eye(S - s)[:, :, None]
+
+    state_mask = np.arange(S)[None, :] < n_states[:, None]
+    return {
+        "transition": transition,
+        "observation": observation,
+        "n_states": n_states,
+        "n_actions": n_actions,
+        "n_obs": n_obs,
+        "state_mask": state_mask,
+        "belief": normalize(state_mask.astype(float)),
+        "state": (rng.random(len(agents)) * n_states).astype(int),
+    }
+
+
+def random_agents(n_states, n_actions, n_obs, rng=None):
+    """Random models drawn and normalized as in Simulation 1.py, one per entry of the size lists."""
+    rng = np.random if rng is None else rng
+    agents = []
+    for s, a, o in zip(n_states, n_actions, n_obs):
+        agents.append({
+            "transition": normalize(rng.random((s, s, a)), axis=1),
+            "observation": normalize(rng.random((o, s)), axis=0),
+        })
+    return agents
+
+
+def random_population(n_states, n_actions, n_obs, rng=None):
+    """Population of random agents with the given per-agent state, action and observation counts."""
+    return stack_agents(random_agents(n_states, n_actions, n_obs, rng), rng)
+
+
+def group_agents(agents, rng=None):
+    """Split agents into populations of equal sizes, so no padding is needed.
+
+    Returns a list of (agent indices, population) pairs.
+    """
+    shapes = [agent["transition"].shape + agent["observation"].shape[:1] for agent in agents]
+    groups = {}
+    for n, shape in enumerate(shapes):
+        groups.setdefault(shape, []).append(n)
+    return [(np.array(indices), stack_agents([agents[n] for n in indices], rng)) for indices in groups.values()]
+
+
+def calculate_free_energy(belief, observation, O, T):
+    """Free energy of Simulation 1.py for every agent: belief (N, S), observation (N,), O (N, O, S), T (N, S, S)."""
+    predicted = np.einsum("ns,ns->n", O[np.arange(len(belief)), observation], np.einsum("nij,nj->ni", T, belief))
+    return -np.sum(belief * np.log(predicted[:, None] + 1e-8), axis=1)
+
+
+def population_step(population, rng=None, actions=None):
+    """Advance every agent by one predict/sample/observe/update step.
+
+    Actions are drawn uniformly unless given as an (N,) array, which lets callers
+    couple agents. Returns the actions, observations and free energy of the step.
+    """
+    rng = np.random if rng is None else rng
+    transition, observation = population["transition"], population["observation"]
+    belief, state = population["belief"], population["state"]
+    agent = np.arange(len(belief))
+
+    if actions is None:
+        actions = (rng.random(len(belief)) * population["n_actions"]).astype(int)
+    T_action = transition[agent, :, :, actions]
+    state = sample_rows(T_action[agent, state], rng)
+    obs = sample_rows(observation[agent, :, state], rng)
+
+    # Prediction is shared by the free energy and the belief update
+    predicted = np.einsum("nij,nj->ni", T_action, belief)
+    likelihood = observation[agent, obs]
+    free_energy = -np.sum(belief * np.log(np.sum(likelihood * predicted, axis=1, keepdims=True) + 1e-8), axis=1)
+    belief = likelihood * predicted
+    belief /= belief.sum(axis=1, keepdims=True)
+
+    population["state"], population["belief"] = state, belief
+    return actions, obs, free_energy
+
+
+def simulate_population(population, T, rng=None, record_beliefs=True):
+    """Run T steps and record states, beliefs and free energy of every agent."""
+    n_agents, n_states = population["belief"].shape
+    states_over_time = np.zeros((T, n_agents), dtype=int)
+    beliefs_over_time = np.zeros((T, n_agents, n_states)) if record_beliefs else None
+    free_energy_over_time = np.zeros((T, n_agents))
+
+    for t in range(T):
+        _, _, free_energy_over_time[t] = population_step(population, rng)
+        states_over_time[t] = population["state"]
+        if record_beliefs:
+            beliefs_over_time[t] = population["belief"]
+
+    return {
+        "states": states_over_time,
+        "beliefs": beliefs_over_time,
+        "free_energy": free_energy_over_time,
+    }
@@ -0,0 +1,98 @@
+import numpy as np
+
+# Log-space Bayes filter shared by Simulation 1 and the tennis players.
+# One step predicts with a transition matrix (optional), corrects with the log-likelihood
+# of the observation and normalizes. The predicted-likelihood product is formed once:
+#   joint = log(transition @ belief) + log_likelihood,  log p(o) = logsumexp(joint)
+# and both the posterior (joint - log p(o)) and the free energy (-log p(o), which is
+# what -sum(belief * log(O[o] @ T @ belief)) reduces to for a normalized belief) come
+# from it, without the 1e-8 guard: zero likelihoods become -inf log beliefs instead of
+# underflowing probabilities, so long runs never lose states to rounding.
+# Beliefs are kept both as log probabilities and as probabilities, updated in place
+# through out= arguments into buffers allocated once per filter.
+#
+#   belief_filter = BeliefFilter((n_matches, 5))
+#   log_evidence = belief_filter.step(log_likelihood)           # correct only
+#   log_evidence = belief_filter.step(log_likelihood, T[:, :, a])  # predict, then correct
+#   belief_filter.belief                                         # (n_matches, 5) posteriors
+
+# Beliefs more than -EXP_FLOOR below the largest in log space are exponentiated as
+# exp(EXP_FLOOR) ~ 5e-131 instead of underflowing: np.exp, and every later product of
+# the probabilities, is many times slower on subnormals. log_belief keeps the exact value.
+EXP_FLOOR = -300.0
+
+
+def log_table(probabilities, eps=0.0):
+    """log(probabilities + eps), with log(0) = -inf and no warning."""
+    with np.errstate(divide="ignore"):
+        return np.log(np.asarray(probabilities, dtype=float) + eps)
+
+
+def filter_buffers(shape):
+    """Work arrays of filter_step for beliefs of `shape`: (joint, shift, log_evidence)."""
+    batch = tuple(shape[:-1]) + (1,)
+    return np.empty(shape), np.empty(batch), np.empty(batch)
+
+
+def reduce_last(ufunc, values, out):
+    """ufunc.reduce over the last axis into out (..., 1).
+
+    Short axes (the belief states) are reduced column by column, in the same order as
+    numpy's own reduction but many times faster on large batches.
+    """
+    if values.ndim == 1 or not 1 < values.shape[-1] <= 8:
+        return ufunc.reduce(values, axis=-1, keepdims=True, out=out)
+    target = out[..., 0]
+    ufunc(values[..., 0], values[..., 1], out=target)
+    for k in range(2, values.shape[-1]):
+        ufunc(target, values[..., k], out=target)
+    return out
+
+
+def filter_step(log_belief, belief, log_likelihood, transition=None, buffers=None):
+    """One filter step over the last axis, updating log_belief and belief in place.
+
+    log_likelihood is log p(o | state), broadcastable to the beliefs. transition[next, previous]
+    (or a stack of them, one per belief) predicts the beliefs first; without it the step
+    only corrects. Returns the log evidence log p(o), shape log_belief.shape[:-1], which
+    lives in the buffers and is overwritten by the next step.
+    """
+    joint, shift, log_evidence = filter_buffers(log_belief.shape) if buffers is None else buffers
+    if transition is None:
+        np.add(log_belief, log_likelihood, out=joint)
+    else:
+        # belief = exp(log_belief) is normalized, so the prediction needs no rescaling
+        np.matmul(transition, belief[..., None], out=joint[..., None])
+        with np.errstate(divide="ignore"):
+            np.log(joint, out=joint)
+        joint += log_likelihood
+    # logsumexp, shifted by the largest term
+    reduce_last(np.maximum, joint, shift)
+    joint -= shift
+    np.maximum(joint, EXP_FLOOR, out=belief)
+    np.exp(belief, out=belief)
+    reduce_last(np.add, belief, log_evidence)
+    belief /= log_evidence
+    np.log(log_evidence, out=log_evidence)
+    np.subtract(joint, log_evidence, out=log_belief)
+    log_evidence += shift
+    return log_evidence[..., 0]
+
+
+class BeliefFilter:
+    """Beliefs of shape (..., n_states) with their own filter_step buffers.
+
+    Starts from uniform beliefs unless `belief` is given.
+    """
+
+    def __init__(self, shape, belief=None):
+        shape = tuple(shape)
+        if belief is None:
+            belief = np.full(shape, 1 / shape[-1])
+        self.belief = np.array(belief, dtype=float)
+        self.log_belief = log_table(self.belief)
+        self.buffers = filter_buffers(shape)
+
+    def step(self, log_likelihood, transition=None):
+        """Predict with transition if given, correct with log_likelihood; returns log p(o)."""
+        return filter_step(self.log_belief, self.belief, log_likelihood, transition, self.buffers)
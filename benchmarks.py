@@ -0,0 +1,314 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Benchmark suite for the simulation hot paths and their scaling curves.
+# Results are saved as JSON tagged with the git commit, so two runs can be compared:
+#
+#   python benchmarks.py                        # writes benchmark_results/<commit>.json
+#   python benchmarks.py --quick --filter tennis
+#   python benchmarks.py --compare benchmark_results/old.json benchmark_results/new.json
+
+BENCHMARKS = {}  # name -> (group, params, setup); setup() returns (callable, items per call)
+RESULTS_DIR = "benchmark_results"
+REGRESSION_THRESHOLD = 1.2  # Slowdown ratio reported as a regression by --compare
+
+STATE_COUNTS = [3, 10, 30, 100, 300]
+PLANNING_HORIZONS = [1, 2, 3, 5, 8]
+EXACT_HORIZONS = [1, 2, 3, 4, 6]
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+
+
+def benchmark(name, group, **params):
+    """Register a setup function under `name`; it returns the callable to time and its item count."""
+    def register(setup):
+        BENCHMARKS[name] = (group, params, lambda: setup(**params))
+        return setup
+    return register
+
+
+def measure(func, repeat=5, min_time=0.05):
+    """Time func like timeit: calibrate the loop count to min_time, keep every repeat's per-call time."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 10**6:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return np.array(times), number
+
+
+# Tennis_simulation_8.py
+def tennis_inputs():
+    import Tennis_simulation_8 as tennis
+
+    likelihood = np.array(list(tennis.update_observation_likelihoods(10, "neutral").values()))
+    beliefs = np.ones(len(tennis.hidden_states)) / len(tennis.hidden_states)
+    preferences = np.array([0.5, 0.2, 0.2, 0.1])
+    return tennis, beliefs, likelihood, preferences
+
+
+@benchmark("tennis.compute_vfe", "hot path")
+def bench_compute_vfe():
+    tennis, beliefs, likelihood, _ = tennis_inputs()
+    return lambda: tennis.compute_vfe(beliefs, "win", likelihood), 1
+
+
+@benchmark("tennis.compute_efe", "hot path")
+def bench_compute_efe():
+    tennis, beliefs, likelihood, preferences = tennis_inputs()
+    return lambda: tennis.compute_efe(beliefs, likelihood, preferences), 1
+
+
+@benchmark("tennis.update_observation_likelihoods", "hot path")
+def bench_update_observation_likelihoods():
+    import Tennis_simulation_8 as tennis
+
+    return lambda: tennis.update_observation_likelihoods(60, "tired"), 1
+
+
+for _horizon in PLANNING_HORIZONS:
+    @benchmark(f"tennis.multi_step_planning[horizon={_horizon}]", "scaling: horizon", horizon=_horizon)
+    def bench_multi_step_planning(horizon):
+        tennis, beliefs, likelihood, preferences = tennis_inputs()
+        return lambda: tennis.multi_step_planning(beliefs, beliefs, likelihood, preferences, horizon), 1
+
+
+for _horizon in EXACT_HORIZONS:
+    @benchmark(f"tennis_planning.exact_multi_step_planning[horizon={_horizon}]", "scaling: horizon", horizon=_horizon)
+    def bench_exact_planning(horizon):
+        from tennis_planning import exact_multi_step_planning
+
+        _, beliefs, likelihood, preferences = tennis_inputs()
+        return lambda: exact_multi_step_planning(beliefs, beliefs, likelihood, preferences, horizon), 1
+
+
+for _n in BATCH_SIZES:
+    @benchmark(f"tennis_batch.simulate_matches[matches={_n}]", "scaling: batch size", n_matches=_n)
+    def bench_simulate_matches(n_matches):
+        from tennis_batch import simulate_matches
+        from tennis_tables import build_model_tables
+
+        tables = build_model_tables(20)
+        rng = np.random.default_rng(0)
+        return lambda: simulate_matches(n_matches, 20, rng=rng, tables=tables), n_matches
+
+
+for _n in BATCH_SIZES:
+    @benchmark(f"tennis_tournament.play[matches={_n}]", "scaling: batch size", n_matches=_n)
+    def bench_tournament_play(n_matches):
+        from tennis_tournament import PlayerPool, make_player
+
+        pool = PlayerPool([make_player(i) for i in range(2 * n_matches)], 20)
+        rng = np.random.default_rng(0)
+        first, second = np.arange(n_matches), np.arange(n_matches, 2 * n_matches)
+        return lambda: pool.play(first, second, rng), n_matches
+
+
+# Simulation 1.py
+def simulation1_steps(models, rng, steps, backend=None):
+    """Callable advancing one run of simulation1_model by `steps` steps.
+
+    The run (alias tables, buffers) is built here, so only step_run is timed.
+    """
+    import simulation1_model
+    from kernels import get_kernels
+
+    run = simulation1_model.start_run(models, rng)
+    kernels = get_kernels(backend)
+    free_energy = np.zeros(len(models))
+
+    def advance():
+        for _ in range(steps):
+            simulation1_model.step_run(run, models, kernels, free_energy)
+    return advance
+
+
+@benchmark("simulation1.step", "hot path")
+def bench_simulation1_step():
+    import simulation1_model
+
+    rng = np.random.default_rng(0)
+    models = simulation1_model.init_models(rng=rng)
+    return simulation1_steps(models, rng, 100), 100
+
+
+for _backend in ("numpy", "numba"):
+    @benchmark(f"simulation1.step[backend={_backend}]", "kernel backend", backend=_backend)
+    def bench_simulation1_backend(backend):
+        import simulation1_model
+        from kernels import KERNELS
+
+        if backend not in KERNELS:
+            raise ImportError(f"{backend} backend not available")
+        rng = np.random.default_rng(0)
+        models = simulation1_model.init_models(rng=rng)
+        return simulation1_steps(models, rng, 100, backend), 100
+
+
+for _n in STATE_COUNTS:
+    @benchmark(f"simulation1.step[states={_n}]", "scaling: state count", n_states=_n)
+    def bench_simulation1_states(n_states):
+        import simulation1_model
+
+        rng = np.random.default_rng(0)
+        models = simulation1_model.init_models([n_states], [2], [n_states], rng)
+        return simulation1_steps(models, rng, 20), 20
+
+
+for _n in BATCH_SIZES:
+    @benchmark(f"agent_population.simulate_population[agents={_n}]", "scaling: batch size", n_agents=_n)
+    def bench_population(n_agents):
+        from agent_population import random_population, simulate_population
+
+        rng = np.random.default_rng(0)
+        population = random_population([3] * n_agents, [2] * n_agents, [3] * n_agents, rng)
+        return lambda: simulate_population(population, 20, rng, record_beliefs=False), n_agents * 20
+
+
+# Simulation 2.py
+@benchmark("simulation2.propagate", "hot path")
+def bench_simulation2_propagate():
+    import simulation2_model
+
+    return lambda: simulation2_model.simulate(50), 50
+
+
+for _n in STATE_COUNTS:
+    @benchmark(f"markov_evolution.propagate[states={_n}]", "scaling: state count", n_states=_n)
+    def bench_propagate_states(n_states):
+        from markov_evolution import propagate
+
+        P = np.random.default_rng(0).random((n_states, n_states))
+        P /= P.sum(axis=1, keepdims=True)
+        belief = np.ones(n_states) / n_states
+        return lambda: propagate(belief, P, 50), 50
+
+
+# Act_Inf_Design_Tool.py
+@benchmark("design_tool.simulate_user", "hot path")
+def bench_simulate_user():
+    # Imports tkinter, but simulate_user needs no window
+    from Act_Inf_Design_Tool import ActiveInferenceUI
+
+    return lambda: ActiveInferenceUI.simulate_user(None, 0.5, 0.5, 0.5), 1
+
+
+def git_commit():
+    """Current commit hash, with a '-dirty' suffix for uncommitted changes; None outside a repository."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def run_benchmarks(names, repeat=5, min_time=0.05):
+    results = {}
+    for name in names:
+        group, params, setup = BENCHMARKS[name]
+        try:
+            func, items = setup()
+        except ImportError as error:
+            print(f"{name:<60} skipped ({error})")
+            continue
+        func()  # Warm up caches and lazy imports
+        times, number = measure(func, repeat, min_time)
+        results[name] = {
+            "group": group,
+            "params": params,
+            "items": items,
+            "number": number,
+            "times": times.tolist(),
+            "best": times.min(),
+            "median": float(np.median(times)),
+            "per_item": times.min() / items,
+        }
+        print(f"{name:<60} {format_time(times.min()):>10}  ({format_time(times.min() / items)} per item)")
+    return results
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def compare(old_path, new_path, threshold=REGRESSION_THRESHOLD):
+    """Print the per-benchmark slowdown of new over old; returns the names that regressed."""
+    old = json.loads(Path(old_path).read_text())
+    new = json.loads(Path(new_path).read_text())
+    print(f"{'benchmark':<60} {old['commit'] or '?':>12} {new['commit'] or '?':>12}   ratio")
+    regressions = []
+    for name in sorted(old["results"].keys() & new["results"].keys()):
+        before, after = old["results"][name]["best"], new["results"][name]["best"]
+        ratio = after / before
+        flag = ""
+        if ratio > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<60} {format_time(before):>12} {format_time(after):>12}   {ratio:.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the simulation hot paths and scaling curves.")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="fewer repeats and shorter timing loops")
+    parser.add_argument("--output", default=None, help=f"result file (default {RESULTS_DIR}/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown ratio reported as a regression")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        regressions = compare(*args.compare, threshold=args.threshold)
+        return 1 if regressions else 0
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        return 0
+
+    repeat, min_time = (3, 0.01) if args.quick else (5, 0.05)
+    commit = git_commit()
+    results = run_benchmarks(names, repeat, min_time)
+
+    output = Path(args.output or Path(RESULTS_DIR) / f"{commit or 'unversioned'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "repeat": repeat,
+        "results": results,
+    }, indent=2, default=float))
+    print(f"Saved {len(results)} results to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import numpy as np
+
+# Categorical sampling without np.random.choice(..., p=...).
+# Uniforms are drawn from the generator in large blocks. Fixed distributions (rows of
+# the transition and observation models) get Walker/Vose alias tables once, after which
+# a draw costs one uniform, one multiply and one comparison. Distributions that change
+# every step go through the batched CDF path instead.
+
+
+def _count_before(values, queries, ties_first):
+    """Per row of sorted (N, K) `values`, how many sort before each sorted query; equal values count unless ties_first."""
+    K = values.shape[1]
+    # Both halves are already sorted, so the stable sort only merges two runs
+    merged = np.concatenate([queries, values] if ties_first else [values, queries], axis=1)
+    order = np.argsort(merged, axis=1, kind="stable")
+    counts = np.empty(merged.shape, dtype=np.int64)
+    np.put_along_axis(counts, order, np.cumsum((order >= K) == ties_first, axis=1), axis=1)
+    return counts[:, :K] if ties_first else counts[:, K:]
+
+
+def alias_table(probs):
+    """Vose alias tables (prob, alias) for every row of a (..., K) probability array.
+
+    Vose's pairing, run with the small entries in order against one large entry at a
+    time, has a closed form in cumulative sums: with C the running deficit of the small
+    entries and E the running surplus of the large ones, a small entry is topped up by
+    the first large entry with E >= C before it, and a large entry drops below 1 at the
+    first C > E, after which the next large entry fills its column. All rows at once.
+    """
+    probs = np.asarray(probs, dtype=float)
+    shape, K = probs.shape, probs.shape[-1]
+    rows = probs.reshape(-1, K)
+    scaled = rows / rows.sum(axis=1, keepdims=True) * K
+    # Small entries first, then the large ones, each in index order
+    order = np.argsort(scaled >= 1.0, axis=1, kind="stable")
+    scaled = np.take_along_axis(scaled, order, axis=1)
+    small = scaled < 1.0
+    n_small = small.sum(axis=1, keepdims=True)
+    position = np.arange(K)
+    deficit = np.where(small, 1.0 - scaled, 0.0)
+    demand = np.cumsum(deficit, axis=1)
+    surplus = np.cumsum(np.where(small, 0.0, scaled - 1.0), axis=1)
+    large_surplus = np.where(small, np.inf, surplus)
+    # Small entries: own probability, alias the first large entry with enough surplus
+    donor = _count_before(large_surplus, np.where(small, demand - deficit, np.inf), ties_first=True)
+    prob = np.where(small, scaled, 1.0)
+    alias = np.where(small, np.minimum(n_small + donor, K - 1), position)
+    # Large entries pushed below 1 keep the remainder and alias the next large entry;
+    # the last one is 1 up to rounding and keeps prob 1
+    served = _count_before(np.where(small, demand, np.inf), large_surplus, ties_first=False)
+    depleted = ~small & (served < n_small) & (position < K - 1)
+    reached = np.take_along_axis(demand, np.minimum(served, K - 1), axis=1)
+    prob = np.where(depleted, 1.0 + surplus - reached, prob)
+    alias = np.where(depleted, position + 1, alias)
+    # Back from sorted positions to entry indices
+    prob_out, alias_out = np.empty_like(prob), np.empty_like(alias)
+    np.put_along_axis(prob_out, order, prob, axis=1)
+    np.put_along_axis(alias_out, order, np.take_along_axis(order, alias, axis=1), axis=1)
+    return prob_out.reshape(shape), alias_out.reshape(shape)
+
+
+def alias_sample(prob, alias, u):
+    """Draw from alias tables (..., K) with one uniform per draw; u broadcasts against the leading axes."""
+    K = prob.shape[-1]
+    scaled = np.asarray(u) * K
+    k = np.minimum(scaled.astype(int), K - 1)
+    keep = (scaled - k) < np.take_along_axis(prob, k[..., None], axis=-1)[..., 0]
+    return np.where(keep, k, np.take_along_axis(alias, k[..., None], axis=-1)[..., 0])
+
+
+def cdf_sample(cdf, u):
+    """Draw one index per row of an (N, K) array of cumulative probabilities, given uniforms u in [0, 1).
+
+    Rows need not be normalized. Small K uses a comparison count; large K a single
+    searchsorted over the rows shifted apart by their index.
+    """
+    N, K = cdf.shape
+    u = u * cdf[:, -1]
+    if K <= 32:
+        idx = (cdf <= u[:, None]).sum(axis=1)
+    else:
+        offsets = np.arange(N) * (cdf[:, -1].max() + 1.0)
+        idx = np.searchsorted((cdf + offsets[:, None]).ravel(), u + offsets, side="right") - np.arange(N) * K
+    return np.minimum(idx, K - 1)
+
+
+def sample_rows_from_uniforms(probs, u):
+    """Draw one index per row of an (N, K) probability array that changes between calls."""
+    return cdf_sample(np.cumsum(probs, axis=1), u)
+
+
+def sample_index(probs, u):
+    """Draw one index from a single probability vector with one uniform, without re-validating probs."""
+    cdf = np.cumsum(probs)
+    return min(int(np.searchsorted(cdf, u * cdf[-1], side="right")), len(cdf) - 1)
+
+
+class UniformStream:
+    """Uniforms from rng, fetched block_size at a time."""
+
+    def __init__(self, rng=None, block_size=4096):
+        self.rng = np.random if rng is None else rng
+        self.block_size = block_size
+        self._block = []
+        self._pos = 0
+
+    def random(self):
+        """One uniform as a Python float."""
+        if self._pos == len(self._block):
+            self._block = self.rng.random(self.block_size).tolist()
+            self._pos = 0
+        self._pos += 1
+        return self._block[self._pos - 1]
+
+    def take(self, n):
+        """n uniforms as an array; draws a fresh block when the buffered ones do not suffice."""
+        if self._pos + n > len(self._block):
+            self._block = self._block[self._pos:] + self.rng.random(max(self.block_size, n)).tolist()
+            self._pos = 0
+        self._pos += n
+        return np.array(self._block[self._pos - n:self._pos])
+
+    def get_state(self):
+        """Generator state plus the unused buffered uniforms, for checkpointing."""
+        rng_state = self.rng.bit_generator.state if hasattr(self.rng, "bit_generator") else self.rng.get_state()
+        return {"rng": rng_state, "block": self._block[self._pos:]}
+
+    def set_state(self, state):
+        if hasattr(self.rng, "bit_generator"):
+            self.rng.bit_generator.state = state["rng"]
+        else:
+            self.rng.set_state(state["rng"])
+        self._block, self._pos = list(state["block"]), 0
+
+
+class RowSampler:
+    """Alias-table sampler over the fixed rows of a (R, K) probability array."""
+
+    def __init__(self, probs, stream=None):
+        probs = np.asarray(probs, dtype=float)
+        self.prob, self.alias = alias_table(probs.reshape(-1, probs.shape[-1]))
+        self.K = self.prob.shape[1]
+        # Nested lists make the scalar path much cheaper than numpy scalar indexing
+        self._prob, self._alias = self.prob.tolist(), self.alias.tolist()
+        self.stream = UniformStream() if stream is None else stream
+
+    def draw(self, row):
+        """One index drawn from row `row`."""
+        scaled = self.stream.random() * self.K
+        k = min(int(scaled), self.K - 1)
+        return k if scaled - k < self._prob[row][k] else self._alias[row][k]
+
+    def draw_many(self, rows):
+        """One index for each row in the integer array `rows`."""
+        rows = np.asarray(rows)
+        return alias_sample(self.prob[rows], self.alias[rows], self.stream.take(rows.size).reshape(rows.shape))
@@ -0,0 +1,172 @@
+import os
+
+import numpy as np
+
+from belief_filter import EXP_FLOOR, filter_step
+
+try:
+    import numba
+except ImportError:  # numba is optional; the NumPy kernels are used without it
+    numba = None
+
+# Core kernels of the sequential loops with interchangeable backends:
+#   filter_step(log_belief, belief, log_likelihood, transition, buffers)
+#       Simulation 1 log-space belief update in place, argument order of belief_filter.filter_step;
+#       returns log p(o)
+#   compute_vfe(beliefs, likelihood)                         tennis VFE and posterior for one observation
+#   compute_efe(beliefs, observation_likelihood, preferences)
+#   planning_rollout(beliefs, observation_likelihood, preferences, uniforms)
+#       cumulative EFE of the sampled rollout of every action, uniforms (n_actions, horizon)
+# "numpy" is the reference implementation. Its VFE, EFE and rollout kernels contract with
+# elementwise products and axis sums instead of BLAS matmul, so their accumulation order
+# is that of the explicit loops below (numpy sums fewer than 8 terms sequentially).
+# "numba" compiles those loops, and "python" runs them uncompiled to check that the
+# backends agree bit for bit. filter_step_numpy is belief_filter.filter_step, which
+# predicts with np.matmul and calls exp and log; the loop version agrees to rounding.
+# The backend is picked at runtime: KERNEL_BACKEND=numpy|numba|python, else numpy.
+
+VFE_EPS = 1e-5
+
+
+# NumPy kernels
+def filter_step_numpy(log_belief, belief, log_likelihood, transition, buffers):
+    return float(filter_step(log_belief, belief, log_likelihood, transition, buffers))
+
+
+def compute_vfe_numpy(beliefs, likelihood):
+    joint = likelihood * beliefs
+    posterior = joint / joint.sum()
+    return -(posterior * np.log(likelihood + VFE_EPS)).sum(), posterior
+
+
+def compute_efe_numpy(beliefs, observation_likelihood, preferences):
+    divergence = np.log(observation_likelihood + VFE_EPS) - np.log(preferences + VFE_EPS)
+    # Summed in row-major order, like the nested loop of Tennis_simulation_8.compute_efe
+    return np.cumsum(beliefs[:, None] * observation_likelihood * divergence)[-1]
+
+
+def planning_rollout_numpy(beliefs, observation_likelihood, preferences, uniforms):
+    n_actions, horizon = uniforms.shape
+    costs = np.zeros(n_actions)
+    for a in range(n_actions):
+        simulated_beliefs = beliefs.copy()
+        for h in range(horizon):
+            cdf = (observation_likelihood * simulated_beliefs[:, None]).sum(axis=0).cumsum()
+            observation = min(int(np.searchsorted(cdf, uniforms[a, h] * cdf[-1], side="right")), len(cdf) - 1)
+            _, simulated_beliefs = compute_vfe_numpy(simulated_beliefs, observation_likelihood[:, observation])
+            costs[a] += compute_efe_numpy(simulated_beliefs, observation_likelihood, preferences)
+    return costs
+
+
+# Loop kernels, compiled by numba (they also run, slowly, as plain Python)
+def filter_step_loop(log_belief, belief, log_likelihood, transition, buffers):
+    joint = buffers[0]
+    n = belief.shape[0]
+    shift = -np.inf
+    for i in range(n):
+        predicted = 0.0
+        for j in range(n):
+            predicted += transition[i, j] * belief[j]
+        joint[i] = np.log(predicted) + log_likelihood[i]
+        shift = max(shift, joint[i])
+    total = 0.0
+    for i in range(n):
+        joint[i] -= shift
+        belief[i] = np.exp(max(joint[i], EXP_FLOOR))
+        total += belief[i]
+    log_total = np.log(total)
+    for i in range(n):
+        belief[i] /= total
+        log_belief[i] = joint[i] - log_total
+    return shift + log_total
+
+
+def compute_vfe_loop(beliefs, likelihood):
+    n = beliefs.shape[0]
+    joint = np.empty(n)
+    total = 0.0
+    for i in range(n):
+        joint[i] = likelihood[i] * beliefs[i]
+        total += joint[i]
+    vfe = 0.0
+    for i in range(n):
+        joint[i] /= total
+        vfe += joint[i] * np.log(likelihood[i] + VFE_EPS)
+    return -vfe, joint
+
+
+def compute_efe_loop(beliefs, observation_likelihood, preferences):
+    n_states, n_obs = observation_likelihood.shape
+    efe = 0.0
+    for i in range(n_states):
+        for j in range(n_obs):
+            p = observation_likelihood[i, j]
+            efe += beliefs[i] * p * (np.log(p + VFE_EPS) - np.log(preferences[j] + VFE_EPS))
+    return efe
+
+
+def make_planning_rollout(compute_vfe, compute_efe):
+    """planning_rollout loop kernel over the given VFE and EFE kernels; each backend builds its own."""
+    def planning_rollout_loop(beliefs, observation_likelihood, preferences, uniforms):
+        n_actions, horizon = uniforms.shape
+        n_states, n_obs = observation_likelihood.shape
+        costs = np.zeros(n_actions)
+        cdf = np.empty(n_obs)
+        for a in range(n_actions):
+            simulated_beliefs = beliefs.copy()
+            for h in range(horizon):
+                running = 0.0
+                for j in range(n_obs):
+                    probability = 0.0
+                    for i in range(n_states):
+                        probability += observation_likelihood[i, j] * simulated_beliefs[i]
+                    running += probability
+                    cdf[j] = running
+                threshold = uniforms[a, h] * cdf[n_obs - 1]
+                observation = 0
+                while observation < n_obs - 1 and cdf[observation] <= threshold:
+                    observation += 1
+                _, simulated_beliefs = compute_vfe(simulated_beliefs, observation_likelihood[:, observation])
+                costs[a] += compute_efe(simulated_beliefs, observation_likelihood, preferences)
+        return costs
+    return planning_rollout_loop
+
+
+planning_rollout_loop = make_planning_rollout(compute_vfe_loop, compute_efe_loop)
+
+
+KERNEL_NAMES = ["filter_step", "compute_vfe", "compute_efe", "planning_rollout"]
+
+KERNELS = {
+    "numpy": {name: globals()[f"{name}_numpy"] for name in KERNEL_NAMES},
+    "python": {name: globals()[f"{name}_loop"] for name in KERNEL_NAMES},
+}
+
+
+def _compile_numba():
+    # Compiled copies; the rollout closes over the compiled VFE/EFE kernels, leaving the
+    # "python" backend uncompiled. Closures cannot be cached to disk, so it compiles per process.
+    compiled = {name: numba.njit(cache=True)(globals()[f"{name}_loop"])
+                for name in ("filter_step", "compute_vfe", "compute_efe")}
+    compiled["planning_rollout"] = numba.njit(make_planning_rollout(compiled["compute_vfe"], compiled["compute_efe"]))
+    return compiled
+
+
+if numba is not None:
+    KERNELS["numba"] = _compile_numba()
+
+
+def default_backend():
+    """KERNEL_BACKEND from the environment if set, else numpy.
+
+    numba stays opt-in until its kernels are checked against numpy for equality.
+    """
+    return os.environ.get("KERNEL_BACKEND") or "numpy"
+
+
+def get_kernels(backend=None):
+    """Kernel functions of a backend as a dict; None picks default_backend()."""
+    backend = default_backend() if backend is None else backend
+    if backend not in KERNELS:
+        raise ValueError(f"kernel backend {backend!r} is not available; choose from {sorted(KERNELS)}")
+    return KERNELS[backend]
@@ -0,0 +1,107 @@
+import numpy as np
+
+# Closed-form evolution of the linear belief propagation in Simulation 2.py,
+# belief[t] = belief[t-1] @ transition_model, i.e. belief[t] = belief[0] @ P^t.
+# Every function also accepts stacks of beliefs (..., n) and transition models
+# (..., n, n), so parameter sweeps run as one array operation.
+
+
+def evolve(belief, transition_model, t):
+    """Belief after t steps, computed with O(log t) matrix products by repeated squaring."""
+    return np.einsum("...i,...ij->...j", belief, np.linalg.matrix_power(transition_model, t))
+
+
+def stationary_distribution(transition_model):
+    """Stationary distribution pi = pi @ P, solved directly from (P^T - I) pi = 0 with sum(pi) = 1."""
+    P = np.asarray(transition_model, dtype=float)
+    n = P.shape[-1]
+    A = np.swapaxes(P, -1, -2) - np.eye(n)
+    # Replace the last (redundant) balance equation by the normalization constraint
+    A[..., -1, :] = 1.0
+    b = np.zeros(P.shape[:-1])
+    b[..., -1] = 1.0
+    return np.linalg.solve(A, b[..., None])[..., 0]
+
+
+def belief_trajectory(belief, transition_model, times):
+    """Beliefs at every time in `times` from the eigendecomposition of P: (..., len(times), n).
+
+    Falls back to repeated squaring when P is too close to defective.
+    """
+    times = np.asarray(times)
+    eigenvalues, V = np.linalg.eig(transition_model)
+    if np.any(np.linalg.cond(V) > 1e8):
+        return np.stack([evolve(belief, transition_model, int(t)) for t in times], axis=-2)
+    coefficients = np.einsum("...i,...ik->...k", belief, V)
+    powers = eigenvalues[..., None, :] ** times[:, None]
+    return np.einsum("...tk,...kj->...tj", coefficients[..., None, :] * powers, np.linalg.inv(V)).real
+
+
+def convergence_time(belief, transition_model, tol=1e-8, max_steps=10**12):
+    """First t with ||belief[t] - pi||_1 <= tol, found by binary lifting on P, P^2, P^4, ...
+
+    The L1 distance to the stationary distribution never increases under a
+    stochastic matrix, so the search is exact. Stacks give one time per model, an
+    integer array of the stack shape. Returns max_steps where not reached.
+    """
+    P = np.asarray(transition_model, dtype=float)
+    belief = np.asarray(belief, dtype=float)
+    pi = stationary_distribution(P)
+
+    def distance(belief):
+        return np.abs(belief - pi).sum(axis=-1)
+
+    def step(belief, power):
+        return np.einsum("...i,...ij->...j", belief, power)
+
+    # Square until every model has converged after the largest power, or it covers max_steps
+    powers = [P]
+    while np.any(distance(step(belief, powers[-1])) > tol) and 2 ** (len(powers) - 1) < max_steps:
+        powers.append(powers[-1] @ powers[-1])
+
+    # Largest t that has not converged yet, from the highest power down
+    unconverged = np.zeros(np.shape(distance(belief)), dtype=np.int64)
+    current = belief
+    for k in reversed(range(len(powers))):
+        candidate = step(current, powers[k])
+        advance = distance(candidate) > tol
+        current = np.where(advance[..., None], candidate, current)
+        unconverged += advance * 2 ** k
+    times = np.where(distance(belief) <= tol, 0, np.minimum(unconverged + 1, max_steps))
+    return int(times) if times.ndim == 0 else times
+
+
+def trajectory(belief, transition_model, T):
+    """Beliefs at t = 0 .. T-1, (..., T, n), by doubling: steps [k, 2k) are steps [0, k) @ P^k.
+
+    O(log T) array operations and matrix squarings instead of one step per time.
+    """
+    belief = np.asarray(belief, dtype=float)
+    power = np.asarray(transition_model, dtype=float)
+    batch_shape = np.broadcast_shapes(belief.shape[:-1], power.shape[:-2])
+    beliefs = np.empty(batch_shape + (T, belief.shape[-1]))
+    beliefs[..., 0, :] = belief
+    k = 1
+    while k < T:
+        block = min(k, T - k)
+        beliefs[..., k:k + block, :] = beliefs[..., :block, :] @ power
+        power = power @ power
+        k *= 2
+    return beliefs
+
+
+def propagate(belief, transition_model, T, tol=None):
+    """Beliefs of the propagation in Simulation 2.py for up to T steps: (..., t_end, n).
+
+    With tol given, the run ends at the first step within tol (L1) of the stationary
+    distribution; for stacks, once every model has converged.
+    """
+    t_end = T
+    if tol is not None:
+        t_end = min(T, int(np.max(convergence_time(belief, transition_model, tol, max_steps=T))) + 1)
+    return trajectory(belief, transition_model, t_end)
+
+
+def expected_observations(beliefs, observation_model):
+    """Predicted observation distribution for every belief, as in Simulation 2.py."""
+    return beliefs @ observation_model
@@ -0,0 +1,188 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from streaming_stats import aggregate_results, merge_all
+
+# Reproducible multi-core Monte Carlo for the tennis matches and Simulation 1 trajectories.
+# Runs are cut into fixed-size blocks; block b draws from its own Generator built from
+# SeedSequence(seed).spawn(n_blocks)[b]. Results therefore depend on the seed and the
+# block size, never on the number of workers or the order in which blocks finish.
+# Workers write their block straight into shared-memory output arrays, so only block
+# indices and seeds cross process boundaries.
+#
+#   results = run_parallel("tennis", 10000, seed=42, workers=8, horizon=3)
+#   results["player1_vfe"].shape  # (10000, 120)
+
+DEFAULT_BLOCK_SIZE = 64
+
+
+# Tennis matches (tennis_batch.simulate_matches)
+@lru_cache(maxsize=None)
+def _tennis_tables(total_points):
+    from tennis_tables import build_model_tables
+
+    return build_model_tables(total_points)
+
+
+def tennis_outputs(total_points=None, **params):
+    from tennis_tables import TOTAL_POINTS, hidden_states
+
+    points = total_points or TOTAL_POINTS
+    outputs = {}
+    for player in ("player1", "player2"):
+        outputs[f"{player}_vfe"] = (points,)
+        outputs[f"{player}_efe"] = (points,)
+        outputs[f"{player}_beliefs"] = (len(hidden_states),)
+        outputs[f"{player}_fatigue"] = ()
+        outputs[f"{player}_points_won"] = ()
+    return outputs
+
+
+def tennis_block(n_runs, rng, total_points=None, **params):
+    from tennis_batch import simulate_matches
+    from tennis_tables import TOTAL_POINTS
+
+    points = total_points or TOTAL_POINTS
+    return simulate_matches(n_runs, points, rng=rng, tables=_tennis_tables(points), **params)
+
+
+# Simulation 1 trajectories (simulation1_model.simulate), each with its own random models
+def simulation1_outputs(T=None, n_states=None, **params):
+    import simulation1_model
+
+    T = T or simulation1_model.T
+    n_states = n_states or simulation1_model.n_states
+    return {
+        "states": (T, len(n_states)),
+        "beliefs": (T, sum(n_states)),
+        "free_energy": (T, len(n_states)),
+    }
+
+
+def simulation1_block(n_runs, rng, T=None, **params):
+    import simulation1_model
+
+    T = T or simulation1_model.T
+    results = [simulation1_model.simulate(T, rng=rng, **params) for _ in range(n_runs)]
+    return {key: np.stack([r[key] for r in results]) for key in results[0]}
+
+
+TASKS = {
+    "tennis": (tennis_outputs, tennis_block),
+    "simulation1": (simulation1_outputs, simulation1_block),
+}
+
+
+def _run_block(task, start, stop, seed, outputs, params):
+    """Simulate runs [start, stop) with the block's own Generator and write them into outputs."""
+    results = TASKS[task][1](stop - start, np.random.default_rng(seed), **params)
+    for key, out in outputs.items():
+        out[start:stop] = results[key]
+
+
+def _run_shared_block(task, start, stop, seed, buffers, params):
+    """Worker side of _run_block: attach the shared-memory outputs by name."""
+    blocks = {key: shared_memory.SharedMemory(name=name) for key, (name, _, _) in buffers.items()}
+    try:
+        outputs = {key: np.ndarray(shape, dtype, buffer=blocks[key].buf)
+                   for key, (_, shape, dtype) in buffers.items()}
+        _run_block(task, start, stop, seed, outputs, params)
+        del outputs
+    finally:
+        for block in blocks.values():
+            block.close()
+    return start
+
+
+def run_parallel(task, n_runs, seed=None, workers=None, block_size=DEFAULT_BLOCK_SIZE, **params):
+    """Run n_runs independent simulations of `task` ("tennis" or "simulation1") on a process pool.
+
+    Keyword params go to the task (e.g. horizon and total_points for tennis, T for
+    simulation1). With workers=1 everything runs in this process, with identical results.
+    Returns a dict of (n_runs, ...) arrays.
+    """
+    output_shapes, _ = TASKS[task]
+    starts = list(range(0, n_runs, block_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    shapes = {key: (n_runs,) + shape for key, shape in output_shapes(**params).items()}
+    workers = min(workers or os.cpu_count() or 1, len(starts))
+
+    if workers <= 1:
+        results = {key: np.zeros(shape) for key, shape in shapes.items()}
+        for start, block_seed in zip(starts, seeds):
+            _run_block(task, start, min(start + block_size, n_runs), block_seed, results, params)
+        return results
+
+    dtype = np.dtype(float)
+    blocks = {key: shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+              for key, shape in shapes.items()}
+    try:
+        buffers = {key: (blocks[key].name, shape, dtype.str) for key, shape in shapes.items()}
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(_run_shared_block, task, start, min(start + block_size, n_runs), block_seed,
+                                   buffers, params)
+                       for start, block_seed in zip(starts, seeds)]
+            for future in futures:
+                future.result()
+        # One copy out of shared memory so the results outlive the blocks
+        return {key: np.ndarray(shape, dtype, buffer=blocks[key].buf).copy() for key, shape in shapes.items()}
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+
+
+def _aggregate_block(task, start, stop, seed, value_ranges, bins, params):
+    """Simulate runs [start, stop) and return only their streaming statistics."""
+    results = TASKS[task][1](stop - start, np.random.default_rng(seed), **params)
+    return aggregate_results(results, value_ranges, bins)
+
+
+def aggregate_parallel(task, n_runs, seed=None, workers=None, block_size=DEFAULT_BLOCK_SIZE, value_ranges=None,
+                       bins=128, **params):
+    """Like run_parallel, but return {field: StreamingStats} instead of every trajectory.
+
+    Memory grows with the block size and the number of statistics, not with n_runs.
+    Fields without an entry in value_ranges get their histogram range from the first
+    block, which is simulated in this process before the others are distributed.
+    """
+    starts = list(range(0, n_runs, block_size))
+    seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    spans = [(start, min(start + block_size, n_runs), block_seed) for start, block_seed in zip(starts, seeds)]
+    first = _aggregate_block(task, *spans[0], value_ranges, bins, params)
+    value_ranges = {name: (stats.edges[0], stats.edges[-1]) for name, stats in first.items()}
+
+    workers = min(workers or os.cpu_count() or 1, len(spans) - 1)
+    if workers <= 1:
+        parts = [_aggregate_block(task, *span, value_ranges, bins, params) for span in spans[1:]]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(_aggregate_block, task, *span, value_ranges, bins, params) for span in spans[1:]]
+            parts = [future.result() for future in futures]
+    # Merged in block order, so the result does not depend on the worker count
+    return merge_all([first] + parts)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Run independent simulations on a process pool.")
+    parser.add_argument("task", choices=sorted(TASKS))
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="runs per random stream")
+    parser.add_argument("--output", default=None, help="save the results as compressed .npz")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_parallel(args.task, args.runs, args.seed, args.workers, args.block_size)
+    elapsed = time.perf_counter() - start
+    print(f"{args.task}: {args.runs} runs in {elapsed:.2f}s ({args.runs / elapsed:.0f} runs/s)")
+    if args.output:
+        np.savez_compressed(args.output, **results)
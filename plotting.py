@@ -0,0 +1,191 @@
+import numpy as np
+
+# Shared plotting layer for long trajectories and large batches of runs.
+# Matplotlib draws every vertex it is given, so series are reduced to about
+# MAX_POINTS vertices before plotting: min/max binning keeps every spike and is fully
+# vectorized, LTTB (largest triangle three buckets) keeps the visual shape with one
+# point per bucket. Heatmaps are averaged over bins of columns, and batches are drawn
+# as a (smoothed) mean line with a quantile band instead of one line per run.
+# The decimation helpers are plain NumPy; matplotlib is only imported to make figures.
+#
+#   fig, ax = plt.subplots()
+#   plot_series(ax, np.arange(10**6), free_energy)        # ~MAX_POINTS vertices drawn
+#   plot_band(ax, np.arange(120), vfe_of_every_match, window=10)
+
+MAX_POINTS = 2000
+MAX_COLUMNS = 1000
+QUANTILES = (0.05, 0.95)
+
+
+# Decimation
+def bin_edges(n, n_bins):
+    """Start indices of n_bins contiguous, nearly equal bins over n items."""
+    return np.linspace(0, n, n_bins + 1).astype(np.int64)[:-1]
+
+
+def bin_reduce(values, n_bins, how="mean", axis=-1):
+    """Reduce `values` along `axis` to n_bins bins with mean, min or max."""
+    values = np.asarray(values, dtype=float)
+    n = values.shape[axis]
+    if n <= n_bins:
+        return values
+    starts = bin_edges(n, n_bins)
+    if how == "mean":
+        counts = np.diff(np.append(starts, n)).reshape([-1 if a == axis % values.ndim else 1
+                                                       for a in range(values.ndim)])
+        return np.add.reduceat(values, starts, axis=axis) / counts
+    return {"min": np.minimum, "max": np.maximum}[how].reduceat(values, starts, axis=axis)
+
+
+def minmax_indices(y, max_points=MAX_POINTS):
+    """Indices of the first and last point and of the minimum and maximum of every bin."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    n_bins = max(max_points // 2 - 1, 1)
+    size = -(-n // n_bins)
+    # Pad with the last value so every bin has `size` points; padding never beats it
+    padded = np.concatenate([y, np.full(n_bins * size - n, y[-1])]).reshape(n_bins, size)
+    offsets = np.arange(n_bins) * size
+    indices = np.concatenate([[0, n - 1], offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1)])
+    return np.unique(np.minimum(indices, n - 1))
+
+
+def lttb_indices(x, y, max_points=MAX_POINTS):
+    """Largest-triangle-three-buckets: one point per bucket, chosen to keep the shape of the curve."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    # Buckets over the interior points; the first and last point are always kept
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    # Averages of the next bucket, for all buckets at once
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    mean_x = np.append(sums_x / counts, x[-1])
+    mean_y = np.append(sums_y / counts, y[-1])
+
+    selected = 0
+    for b in range(max_points - 2):
+        start, stop = edges[b], edges[b + 1]
+        bx, by = x[start:stop], y[start:stop]
+        # Twice the triangle area between the selected point, each candidate and the next bucket's mean
+        area = np.abs((x[selected] - mean_x[b + 1]) * (by - y[selected])
+                      - (x[selected] - bx) * (mean_y[b + 1] - y[selected]))
+        selected = start + int(area.argmax())
+        indices[b + 1] = selected
+    return indices
+
+
+def decimate(x, y, max_points=MAX_POINTS, method="minmax"):
+    """(x, y) reduced to about max_points vertices with `method` ("minmax" or "lttb")."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == "lttb":
+        indices = lttb_indices(x, y, max_points)
+    elif method == "minmax":
+        indices = minmax_indices(y, max_points)
+    else:
+        raise ValueError(f"unknown decimation method: {method}")
+    return x[indices], y[indices]
+
+
+def moving_average(y, window, axis=-1):
+    """Centred moving average along `axis` with zero padding, in O(n) with a cumulative sum.
+
+    Always returns the n input samples: np.convolve(y, np.ones(window) / window, 'full')
+    from index (window - 1) // 2 on. That is mode='same' for window <= n; for longer
+    windows mode='same' would return window samples instead.
+    """
+    y = np.moveaxis(np.asarray(y, dtype=float), axis, -1)
+    n = y.shape[-1]
+    cumulative = np.concatenate([np.zeros(y.shape[:-1] + (1,)), np.cumsum(y, axis=-1)], axis=-1)
+    # 'same' output i sums the zero-padded input over [i + start - window + 1, i + start]
+    start = (window - 1) // 2
+    i = np.arange(n)
+    stop = np.clip(i + start + 1, 0, n)
+    first = np.clip(i + start - window + 1, 0, n)
+    return np.moveaxis((cumulative[..., stop] - cumulative[..., first]) / window, -1, axis)
+
+
+# Plot helpers (take a matplotlib Axes)
+def plot_series(ax, x, y, *args, max_points=MAX_POINTS, method="minmax", **kwargs):
+    """ax.plot of one series, or of every column of a (steps, k) array, after decimation."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if y.ndim == 1:
+        return ax.plot(*decimate(x, y, max_points, method), *args, **kwargs)
+    lines = []
+    for column in y.T:
+        lines += ax.plot(*decimate(x, column, max_points, method), *args, **kwargs)
+    return lines
+
+
+def plot_heatmap(ax, image, max_columns=MAX_COLUMNS, **kwargs):
+    """ax.imshow of a (rows, steps) image averaged over bins of columns, on the original step axis."""
+    image = np.asarray(image, dtype=float)
+    rows, steps = image.shape
+    kwargs.setdefault("aspect", "auto")
+    kwargs.setdefault("interpolation", "nearest")
+    return ax.imshow(bin_reduce(image, max_columns), extent=(-0.5, steps - 0.5, rows - 0.5, -0.5), **kwargs)
+
+
+def band_statistics(values, quantiles=QUANTILES):
+    """Mean, lower and upper quantile per step of (runs, steps) values or of a StreamingStats of shape (steps,)."""
+    if hasattr(values, "quantile"):
+        lower, upper = values.quantile(quantiles)
+        return values.mean, lower, upper
+    values = np.asarray(values, dtype=float)
+    lower, upper = np.quantile(values, quantiles, axis=0)
+    return values.mean(axis=0), lower, upper
+
+
+def plot_band(ax, x, values, quantiles=QUANTILES, window=1, max_points=MAX_POINTS, label=None, color=None,
+              alpha=0.25):
+    """Mean line with a shaded quantile band over the runs of a batch.
+
+    values is (runs, steps) or a StreamingStats of shape (steps,), so aggregates from
+    aggregate_parallel plot without the trajectories. window > 1 smooths all three
+    curves with moving_average. Long series are binned to max_points: the line shows
+    the bin mean and the band spans the lowest lower and highest upper quantile.
+    """
+    mean, lower, upper = band_statistics(values, quantiles)
+    if window > 1:
+        mean, lower, upper = moving_average(np.stack([mean, lower, upper]), window)
+    x = np.asarray(x, dtype=float)
+    x, mean = bin_reduce(x, max_points), bin_reduce(mean, max_points)
+    lower, upper = bin_reduce(lower, max_points, "min"), bin_reduce(upper, max_points, "max")
+    line, = ax.plot(x, mean, label=label, color=color)
+    ax.fill_between(x, lower, upper, color=line.get_color(), alpha=alpha, linewidth=0)
+    return line
+
+
+def plot_batch(results, series, quantiles=QUANTILES, window=1, max_points=MAX_POINTS, show=True):
+    """One figure per time series of a batch: every (runs, steps[, k]) array as mean and quantile bands.
+
+    series names the results whose second axis is time (see run_batch.SERIES).
+    """
+    import matplotlib.pyplot as plt
+
+    figures = []
+    for key in series:
+        value = results[key]
+        runs, steps = value.shape[:2]
+        fig, ax = plt.subplots(figsize=(10, 6))
+        columns = np.asarray(value).reshape(runs, steps, -1)
+        for k in range(columns.shape[-1]):
+            label = f"{key}[{k}]" if columns.shape[-1] > 1 else key
+            plot_band(ax, np.arange(steps), columns[..., k], quantiles, window, max_points, label=label)
+        ax.set_xlabel("Time Steps")
+        ax.set_title(f"{key}: mean and {quantiles[0]:g}-{quantiles[-1]:g} quantiles over {runs} runs")
+        ax.legend()
+        ax.grid(True)
+        figures.append(fig)
+    if show:
+        plt.show()
+    return figures
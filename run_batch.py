@@ -0,0 +1,139 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Headless batch runner for the simulations. Results are written as compressed
+# .npz (every array) or Parquet (per-step series in long format); matplotlib and
+# pyarrow are only imported when plotting or Parquet output is requested.
+#
+#   python run_batch.py tennis --runs 1000 --seed 1 --output tennis.npz
+#   python run_batch.py simulation1 --runs 50 --steps 500 --output sim1.parquet
+
+
+def run_simulation1(runs, steps, rng, args):
+    import simulation1_model
+
+    steps = steps or simulation1_model.T
+    results = [simulation1_model.simulate(steps, rng=rng) for _ in range(runs)]
+    return {key: np.stack([r[key] for r in results]) for key in results[0]}
+
+
+def run_simulation2(runs, steps, rng, args):
+    import simulation2_model
+
+    steps = steps or simulation2_model.T
+    initial_beliefs = simulation2_model.INITIAL_BELIEFS
+    if runs > 1:
+        # Independent runs only differ in where the beliefs start
+        initial_beliefs = rng.dirichlet(np.ones(initial_beliefs.shape[1]), size=(runs,) + initial_beliefs.shape[:1])
+    results = simulation2_model.simulate(steps, initial_beliefs=initial_beliefs)
+    arrays = {key: results[key] for key in ("beliefs", "observations", "shared")}
+    if runs == 1:
+        arrays = {key: value[:, None] for key, value in arrays.items()}
+    # Runs first, then time
+    return {key: np.swapaxes(value, 0, 1) for key, value in arrays.items()}
+
+
+def run_tennis(runs, steps, rng, args):
+    import tennis_batch
+
+    steps = steps or tennis_batch.TOTAL_POINTS
+    return tennis_batch.simulate_matches(runs, steps, horizon=args.horizon, rng=rng, planner=args.planner)
+
+
+SIMULATIONS = {
+    "simulation1": run_simulation1,
+    "simulation2": run_simulation2,
+    "tennis": run_tennis,
+}
+
+# Results of every simulation whose second axis is time, (runs, steps, ...); the
+# others (final beliefs, fatigue, ...) are only written to .npz
+SERIES = {
+    "simulation1": ("states", "beliefs", "free_energy"),
+    "simulation2": ("beliefs", "observations", "shared"),
+    "tennis": ("player1_vfe", "player2_vfe", "player1_efe", "player2_efe"),
+}
+
+
+def series_table(results, series):
+    """Columns of the (runs, steps, ...) arrays named in `series` in long format, one row per (run, step)."""
+    runs, steps = results[series[0]].shape[:2]
+    columns = {
+        "run": np.repeat(np.arange(runs), steps),
+        "step": np.tile(np.arange(steps), runs),
+    }
+    for key in series:
+        value = results[key]
+        flat = value.reshape(runs * steps, -1)
+        if value.ndim == 2:
+            columns[key] = flat[:, 0]
+        else:
+            for k in range(flat.shape[1]):
+                columns[f"{key}_{k}"] = flat[:, k]
+    return columns
+
+
+def save_results(results, path, series):
+    """Write every array to .npz, or the time series named in `series` to .parquet."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise SystemExit("Parquet output needs pyarrow; use a .npz path instead") from error
+        pq.write_table(pa.table(series_table(results, series)), path, compression="zstd")
+    else:
+        np.savez_compressed(path, **results)
+
+
+def plot_runs(name, results):
+    """Plot a single run with the simulation's own plotting function, a batch as mean and quantile bands."""
+    runs = len(next(iter(results.values())))
+    if name == "tennis":
+        from Tennis_simulation_8 import plot_match
+        plot_match(results if runs > 1 else {key: value[0] for key, value in results.items()})
+    elif runs > 1:
+        from plotting import plot_batch
+        plot_batch(results, SERIES[name])
+    else:
+        first = {key: value[0] for key, value in results.items()}
+        if name == "simulation1":
+            from simulation1_model import plot_results
+        else:
+            from simulation2_model import plot_results
+        plot_results(first)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run simulations in batch and save the results.")
+    parser.add_argument("simulation", choices=sorted(SIMULATIONS))
+    parser.add_argument("--runs", type=int, default=1, help="number of independent runs")
+    parser.add_argument("--steps", type=int, default=None, help="time steps (points for tennis) per run")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the random generator")
+    parser.add_argument("--horizon", type=int, default=3, help="planning horizon of the tennis players")
+    parser.add_argument("--planner", choices=["sampled", "exact"], default="sampled",
+                        help="action selection of the tennis players")
+    parser.add_argument("--output", default=None, help="output .npz or .parquet file")
+    parser.add_argument("--plot", action="store_true", help="plot the run, or mean and quantile bands of all runs")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    results = SIMULATIONS[args.simulation](args.runs, args.steps, rng, args)
+    elapsed = time.perf_counter() - start
+    print(f"{args.simulation}: {args.runs} run(s) in {elapsed:.2f}s")
+
+    if args.output:
+        save_results(results, args.output, SERIES[args.simulation])
+        print(f"Saved {', '.join(sorted(results))} to {args.output}")
+    if args.plot:
+        plot_runs(args.simulation, results)
+    return results
+
+
+if __name__ == "__main__":
+    main()
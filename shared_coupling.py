@@ -0,0 +1,137 @@
+import numpy as np
+
+from markov_evolution import propagate
+
+# Coupled shared-variable dynamics for Simulation 2.py.
+# Shared variables (engagement_metrics, task_success, ...) are real state that
+# feeds back into every agent:
+#   T_eff[a] = (1 - sum_k C[a, k]) T[a] + sum_k C[a, k] * shared[k]   (every row)
+#   O_eff[a] = (1 - sum_k D[a, k]) O[a] + sum_k D[a, k] * shared[k]   (every row)
+#   beliefs[a] <- beliefs[a] @ T_eff[a],  observations[a] = beliefs[a] @ O_eff[a]
+#   shared <- memory * shared + (1 - memory) * mixing @ observations
+# Beliefs and shared variables are renormalized after every step. With zero
+# coupling and memory this reproduces the loop of Simulation 2.py.
+# All agents, shared variables and any leading batch axes update in one step.
+# Without coupling and memory the beliefs are a plain Markov chain per agent, and
+# simulate_uncoupled computes the whole run without stepping (markov_evolution.py).
+
+
+def coupled_system(agents, shared, mixing, transition_coupling=None, observation_coupling=None, memory=0.0):
+    """Stack agents and shared variables into a coupled system.
+
+    agents   -- list of dicts with 'transition_model' (n, n) and 'observation_model' (n, m)
+    shared   -- dict of name -> (m,) initial value, as the Shared dict of Simulation 2.py
+    mixing   -- (K, A) weights of each agent's observation in each shared variable; rows sum to 1
+    transition_coupling, observation_coupling -- (A, K) feedback strengths, row sums <= 1
+    """
+    transition = np.stack([agent["transition_model"] for agent in agents])
+    observation = np.stack([agent["observation_model"] for agent in agents])
+    n_agents, n_shared = len(agents), len(shared)
+    if transition_coupling is None:
+        transition_coupling = np.zeros((n_agents, n_shared))
+    if observation_coupling is None:
+        observation_coupling = np.zeros((n_agents, n_shared))
+    transition_coupling = np.asarray(transition_coupling, dtype=float)
+    observation_coupling = np.asarray(observation_coupling, dtype=float)
+    if np.any(transition_coupling.sum(axis=-1) > 1) or np.any(observation_coupling.sum(axis=-1) > 1):
+        raise ValueError("coupling strengths of an agent must sum to at most 1")
+    if np.any(transition_coupling) and observation.shape[2] != transition.shape[2]:
+        raise ValueError("transition coupling needs as many observation values as states")
+
+    return {
+        "names": list(shared),
+        "transition": transition,
+        "observation": observation,
+        "shared": np.stack([np.asarray(value, dtype=float) for value in shared.values()]),
+        "mixing": np.asarray(mixing, dtype=float),
+        "transition_coupling": transition_coupling,
+        "observation_coupling": observation_coupling,
+        "memory": memory,
+    }
+
+
+def effective_model(model, coupling, shared):
+    """Mix every row of each agent's model (A, n, m) with its coupled shared variables (..., K, m)."""
+    return (1 - coupling.sum(axis=-1))[..., None, None] * model + (coupling @ shared)[..., None, :]
+
+
+def coupled_product(beliefs, model, coupling, shared):
+    """beliefs @ effective_model(...) for every agent, without building the effective models."""
+    retained = (1 - coupling.sum(axis=-1))[..., None]
+    product = (beliefs[..., None, :] @ model)[..., 0, :]
+    return retained * product + beliefs.sum(axis=-1, keepdims=True) * (coupling @ shared)
+
+
+def coupled_step(system, beliefs, shared):
+    """Advance beliefs (..., A, n) and shared variables (..., K, m) by one step."""
+    beliefs = coupled_product(beliefs, system["transition"], system["transition_coupling"], shared)
+    # The coupled map amplifies rounding errors in the total mass, so renormalize every step
+    beliefs /= beliefs.sum(axis=-1, keepdims=True)
+    observations = coupled_product(beliefs, system["observation"], system["observation_coupling"], shared)
+
+    memory = system["memory"]
+    shared = memory * shared + (1 - memory) * (system["mixing"] @ observations)
+    shared /= shared.sum(axis=-1, keepdims=True)
+    return beliefs, observations, shared
+
+
+def is_uncoupled(system):
+    """True when the shared variables never feed back into the agents and keep no memory."""
+    return not (np.any(system["transition_coupling"]) or np.any(system["observation_coupling"]) or system["memory"])
+
+
+def simulate_uncoupled(system, initial_beliefs, T, tol=None):
+    """simulate_coupled for an uncoupled system, from the closed-form belief trajectories.
+
+    With tol given, the run ends once every agent's beliefs are within tol (L1) of
+    their stationary distribution.
+    """
+    initial_beliefs = np.asarray(initial_beliefs, dtype=float)
+    # (..., A, t, n) -> (t, ..., A, n)
+    beliefs = np.moveaxis(propagate(initial_beliefs, system["transition"], T, tol), -2, 0)
+    observations = np.einsum("...an,anm->...am", beliefs, system["observation"])
+    shared = np.einsum("ka,...am->...km", system["mixing"], observations)
+    shared /= shared.sum(axis=-1, keepdims=True)
+    shared[0] = system["shared"]
+    return {
+        "names": system["names"],
+        "beliefs": beliefs,
+        "observations": observations,
+        "shared": shared,
+    }
+
+
+def simulate_coupled(system, initial_beliefs, T, tol=None):
+    """Run T time steps and record beliefs, observations and shared variables in preallocated arrays.
+
+    initial_beliefs is (..., A, n); leading axes simulate independent copies of the system.
+    Entry 0 of every trajectory holds the initial state. With tol given, the run ends at
+    the first step that moves the beliefs and the shared variables by at most tol (L1).
+    """
+    initial_beliefs = np.asarray(initial_beliefs, dtype=float)
+    batch_shape = initial_beliefs.shape[:-2]
+    shared = np.broadcast_to(system["shared"], batch_shape + system["shared"].shape).copy()
+    n_obs = system["observation"].shape[-1]
+
+    beliefs_over_time = np.zeros((T,) + initial_beliefs.shape)
+    observations_over_time = np.zeros((T,) + initial_beliefs.shape[:-1] + (n_obs,))
+    shared_over_time = np.zeros((T,) + shared.shape)
+
+    beliefs_over_time[0] = initial_beliefs
+    observations_over_time[0] = coupled_product(initial_beliefs, system["observation"], system["observation_coupling"], shared)
+    shared_over_time[0] = shared
+    t_end = T
+    for t in range(1, T):
+        beliefs_over_time[t], observations_over_time[t], shared_over_time[t] = coupled_step(
+            system, beliefs_over_time[t - 1], shared_over_time[t - 1])
+        if tol is not None and max(np.abs(beliefs_over_time[t] - beliefs_over_time[t - 1]).sum(axis=-1).max(),
+                                   np.abs(shared_over_time[t] - shared_over_time[t - 1]).sum(axis=-1).max()) <= tol:
+            t_end = t + 1
+            break
+
+    return {
+        "names": system["names"],
+        "beliefs": beliefs_over_time[:t_end],
+        "observations": observations_over_time[:t_end],
+        "shared": shared_over_time[:t_end],
+    }
@@ -0,0 +1,191 @@
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+from belief_filter import filter_buffers, log_table
+from categorical_sampler import RowSampler, UniformStream
+from kernels import get_kernels
+from trajectory_recorder import CHECKPOINT_FILE, TrajectoryRecorder, load_recording
+
+# Designer/Artifact/User POMDP of Simulation 1.py as importable, side-effect free functions.
+
+# Simulation Parameters
+T = 100  # Number of time steps
+AGENTS = ["Designer", "Artifact", "User"]
+n_states = [3, 3, 3]  # States for Designer, Artifact, User
+n_actions = [2, 2, 2]  # Actions for Designer, Artifact, User
+n_obs = [3, 3, 3]  # Observations for Designer, Artifact, User
+
+
+def normalize(P):
+    return P / P.sum(axis=1, keepdims=True)
+
+
+def init_models(n_states=n_states, n_actions=n_actions, n_obs=n_obs, rng=None):
+    """Random normalized transition tensors (S, S, A) and observation models (O, S), one per agent."""
+    rng = np.random if rng is None else rng
+    transitions = [rng.random((s, s, a)) for s, a in zip(n_states, n_actions)]
+    for T_agent in transitions:
+        for i in range(T_agent.shape[2]):
+            T_agent[:, :, i] = normalize(T_agent[:, :, i])
+    observations = [normalize(rng.random((o, s)).T).T for s, o in zip(n_states, n_obs)]
+    return [{"transition": T_agent, "observation": O} for T_agent, O in zip(transitions, observations)]
+
+
+# Free Energy Function
+def calculate_free_energy(belief, observation, O, T):
+    """-log p(observation) under the predicted belief; step_run gets it from the filter update."""
+    return -np.log(O[observation, :] @ T @ belief)
+
+
+def start_run(models, rng=None, state=None):
+    """Sampling tables and initial beliefs/states of a run; state (from run_state) resumes one."""
+    # Alias tables over the fixed rows: next state per (state, action), observation per state
+    stream = UniformStream(np.random if rng is None else rng)
+    run = {
+        "stream": stream,
+        "transition_samplers": [RowSampler(np.swapaxes(model["transition"], 1, 2), stream) for model in models],
+        "observation_samplers": [RowSampler(model["observation"].T, stream) for model in models],
+        # Filter inputs: log observation models and one set of work buffers per agent
+        "log_observations": [log_table(model["observation"]) for model in models],
+    }
+    n_states = [model["transition"].shape[0] for model in models]
+    run["buffers"] = [filter_buffers((s,)) for s in n_states]
+    if state is None:
+        run["beliefs"] = [np.ones(s) / s for s in n_states]
+        run["log_beliefs"] = [log_table(belief) for belief in run["beliefs"]]
+        run["states"] = [int(stream.random() * s) for s in n_states]
+    else:
+        stream.set_state(state["stream"])
+        run["beliefs"] = [belief.copy() for belief in state["beliefs"]]
+        run["log_beliefs"] = [belief.copy() for belief in state["log_beliefs"]]
+        run["states"] = list(state["states"])
+    return run
+
+
+def run_state(run):
+    """Everything needed to continue a run exactly where it stopped."""
+    return {"beliefs": run["beliefs"], "log_beliefs": run["log_beliefs"], "states": run["states"],
+            "stream": run["stream"].get_state()}
+
+
+def step_run(run, models, kernels, free_energy_out):
+    """Advance every agent by one time step, writing their free energies into free_energy_out.
+
+    The beliefs are updated in place; the free energy is -log p(observation) of the update.
+    """
+    stream, beliefs, log_beliefs, states = run["stream"], run["beliefs"], run["log_beliefs"], run["states"]
+    filter_step = kernels["filter_step"]
+    for k, model in enumerate(models):
+        T_agent = model["transition"]
+        n_agent_actions = T_agent.shape[2]
+        action = int(stream.random() * n_agent_actions)
+        states[k] = run["transition_samplers"][k].draw(states[k] * n_agent_actions + action)
+        observation = run["observation_samplers"][k].draw(states[k])
+        free_energy_out[k] = -filter_step(log_beliefs[k], beliefs[k], run["log_observations"][k][observation],
+                                          T_agent[:, :, action], run["buffers"][k])
+
+
+def simulate(T=T, n_states=n_states, n_actions=n_actions, n_obs=n_obs, rng=None, models=None, backend=None):
+    """Run the belief-update loop of Simulation 1.py and return the recorded arrays.
+
+    backend selects the belief-update and free-energy kernels (see kernels.py).
+    """
+    rng = np.random if rng is None else rng
+    kernels = get_kernels(backend)
+    if models is None:
+        models = init_models(n_states, n_actions, n_obs, rng)
+    n_states = [model["transition"].shape[0] for model in models]
+    run = start_run(models, rng)
+
+    # Record States, Beliefs, and Free Energy
+    states_over_time = np.zeros((T, len(models)))
+    beliefs_over_time = np.zeros((T, sum(n_states)))
+    free_energy_over_time = np.zeros((T, len(models)))
+
+    for t in range(T):
+        step_run(run, models, kernels, free_energy_over_time[t])
+        states_over_time[t, :] = run["states"]
+        beliefs_over_time[t, :] = np.concatenate(run["beliefs"])
+
+    return {
+        "states": states_over_time,
+        "beliefs": beliefs_over_time,
+        "free_energy": free_energy_over_time,
+    }
+
+
+def simulate_to_disk(directory, T=T, n_states=n_states, n_actions=n_actions, n_obs=n_obs, rng=None, models=None,
+                     backend=None, decimation=1, chunk_steps=65536, checkpoint_every=None, resume=False):
+    """Run simulate() for horizons too long for memory, recording every decimation-th step to .npy files.
+
+    With checkpoint_every the run state is saved every that many steps; resume=True
+    continues an interrupted run in `directory` from its last checkpoint, reproducing
+    the uninterrupted trajectory exactly. Returns the memory-mapped recording.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    kernels = get_kernels(backend)
+    if resume and (Path(directory) / CHECKPOINT_FILE).exists():
+        with open(Path(directory) / CHECKPOINT_FILE, "rb") as f:
+            models = pickle.load(f)["state"]["models"]
+    elif models is None:
+        models = init_models(n_states, n_actions, n_obs, rng)
+    n_states = [model["transition"].shape[0] for model in models]
+
+    fields = {
+        "states": ((len(models),), np.int64),
+        "beliefs": ((sum(n_states),), float),
+        "free_energy": ((len(models),), float),
+    }
+    recorder = TrajectoryRecorder(directory, fields, T, decimation, chunk_steps, resume)
+    run = start_run(models, rng, recorder.state)
+    free_energy = np.zeros(len(models))
+
+    for t in range(recorder.start_step, T):
+        step_run(run, models, kernels, free_energy)
+        if t % decimation == 0:
+            recorder.record(t, states=run["states"], beliefs=np.concatenate(run["beliefs"]), free_energy=free_energy)
+        if checkpoint_every and (t + 1) % checkpoint_every == 0:
+            recorder.checkpoint(t + 1, {**run_state(run), "models": models})
+    recorder.close()
+    return load_recording(directory)
+
+
+def plot_results(results, agents=AGENTS):
+    """Plot states, belief dynamics and free energy; matplotlib is only imported here."""
+    import matplotlib.pyplot as plt
+
+    from plotting import plot_heatmap, plot_series
+
+    T = len(results["states"])
+
+    # States Over Time
+    plt.figure(figsize=(10, 6))
+    plot_series(plt.gca(), np.arange(T), results["states"])
+    plt.legend(agents)
+    plt.xlabel('Time Steps')
+    plt.ylabel('State Index')
+    plt.title('States of Designer, Artifact, and User Over Time')
+    plt.grid(True)
+    plt.show()
+
+    # Belief Dynamics
+    plt.figure(figsize=(10, 6))
+    image = plot_heatmap(plt.gca(), results["beliefs"].T, cmap='Greys')
+    plt.colorbar(image, label='Belief Value')
+    plt.xlabel('Time Steps')
+    plt.ylabel('Belief Components')
+    plt.title('Belief Dynamics Over Time')
+    plt.grid(True)
+    plt.show()
+
+    # Free Energy Over Time
+    plt.figure(figsize=(10, 6))
+    plot_series(plt.gca(), np.arange(T), results["free_energy"])
+    plt.legend(agents)
+    plt.xlabel('Time Steps')
+    plt.ylabel('Free Energy')
+    plt.title('Free Energy Minimization Over Time')
+    plt.grid(True)
+    plt.show()
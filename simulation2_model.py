@@ -0,0 +1,110 @@
+import numpy as np
+
+from shared_coupling import coupled_system, is_uncoupled, simulate_coupled, simulate_uncoupled
+
+# Designer/Robot/User belief propagation of Simulation 2.py as importable, side-effect free functions.
+
+# Simulation Parameters
+T = 50  # Simulation time steps
+AGENTS = ["Designer", "Robot", "User"]
+INITIAL_BELIEFS = np.array([[0.7, 0.3], [0.6, 0.4], [0.8, 0.2]])
+
+# Shared variables mix the agents' observations:
+# engagement_metrics = (Designer + User) / 2, task_success = (Robot + Designer) / 2
+SHARED_MIXING = np.array([
+    [0.5, 0.0, 0.5],
+    [0.5, 0.5, 0.0],
+])
+
+
+def default_agents():
+    """Fresh copies of the Designer, Robot and User parameters."""
+    return {
+        'Designer': {
+            'latent_states': ['Objectives'],
+            'sensory_states': ['UserFeedback', 'RobotPerformance'],
+            'actions': ['ModifyDesign'],
+            'transition_model': np.array([[0.8, 0.2], [0.4, 0.6]]),
+            'observation_model': np.array([[0.9, 0.1], [0.2, 0.8]])
+        },
+        'Robot': {
+            'latent_states': ['BehavioralModels'],
+            'sensory_states': ['UserInput', 'EnvironmentData'],
+            'actions': ['BehavioralOutputs'],
+            'transition_model': np.array([[0.7, 0.3], [0.3, 0.7]]),
+            'observation_model': np.array([[0.85, 0.15], [0.25, 0.75]])
+        },
+        'User': {
+            'latent_states': ['EmotionalStates'],
+            'sensory_states': ['PerceivedRobotBehavior'],
+            'actions': ['Feedback'],
+            'transition_model': np.array([[0.9, 0.1], [0.3, 0.7]]),
+            'observation_model': np.array([[0.8, 0.2], [0.3, 0.7]])
+        },
+    }
+
+
+def default_shared():
+    """Initial values of the shared variables."""
+    return {
+        'engagement_metrics': np.array([0.5, 0.5]),
+        'task_success': np.array([0.6, 0.4])
+    }
+
+
+def simulate(T=T, agents=None, shared=None, initial_beliefs=INITIAL_BELIEFS, transition_coupling=None,
+             observation_coupling=None, memory=0.0, tol=None):
+    """Propagate the agents' beliefs for T steps and record beliefs and shared variables.
+
+    Without coupling this is the loop of Simulation 2.py, computed in closed form instead
+    of step by step; see shared_coupling.py for the feedback terms. With tol given the
+    run stops early once the beliefs have converged, so the arrays may hold fewer than T steps.
+    """
+    if agents is None:
+        agents = default_agents()
+    if shared is None:
+        shared = default_shared()
+    system = coupled_system(list(agents.values()), shared, SHARED_MIXING, transition_coupling,
+                            observation_coupling, memory)
+    if is_uncoupled(system):
+        results = simulate_uncoupled(system, initial_beliefs, T, tol)
+    else:
+        results = simulate_coupled(system, initial_beliefs, T, tol)
+    results["agents"] = list(agents)
+    return results
+
+
+def plot_results(results):
+    """Plot agent beliefs and shared variables; matplotlib is only imported here."""
+    import matplotlib.pyplot as plt
+
+    from plotting import plot_series
+
+    T = len(results["beliefs"])
+    panels = [
+        ('Designer Beliefs Over Time', ('-r', 'Objective State 1'), ('-b', 'Objective State 2')),
+        ('Robot Beliefs Over Time', ('-g', 'Behavior Model 1'), ('-k', 'Behavior Model 2')),
+        ('User Beliefs Over Time', ('-m', 'Emotion State 1'), ('-c', 'Emotion State 2')),
+    ]
+
+    plt.figure(figsize=(10, 6))
+    for k, (title, *lines) in enumerate(panels):
+        plt.subplot(3, 1, k + 1)
+        for state, (style, label) in enumerate(lines):
+            plot_series(plt.gca(), np.arange(T), results["beliefs"][:, k, state], style, label=label)
+        plt.title(title)
+        plt.xlabel('Time')
+        plt.ylabel('Belief States')
+        plt.legend()
+    plt.tight_layout()
+    plt.show()
+
+    # Shared Variables
+    plt.figure(figsize=(8, 4))
+    plot_series(plt.gca(), np.arange(T), results["shared"][:, 0, 0], '-o', label='Engagement Metrics')
+    plot_series(plt.gca(), np.arange(T), results["shared"][:, 1, 0], '-x', label='Task Success')
+    plt.title('Shared Variables Over Time')
+    plt.xlabel('Time')
+    plt.ylabel('Values')
+    plt.legend()
+    plt.show()
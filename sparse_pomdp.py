@@ -0,0 +1,117 @@
+import numpy as np
+import scipy.sparse as sp
+
+# Sparse backend for the POMDP of Simulation 1.py, for large but locally
+# connected state spaces. A model is a dict holding
+#   transition             list of CSR (S, S) matrices, one per action, T_a[s, s']
+#   observation            CSR (O, S), O[o, s]
+#   observation_by_state   CSR (S, O), the transpose, for sampling observations
+# Belief updates, free energy and sampling only touch non-zero entries, so one
+# step costs O(nnz) instead of O(S^2).
+
+
+def sparse_model(transitions, observation):
+    """Build a sparse model from per-action (S, S) transition matrices and an (O, S) observation matrix."""
+    observation = sp.csr_matrix(observation)
+    return {
+        "transition": [sp.csr_matrix(T) for T in transitions],
+        "observation": observation,
+        "observation_by_state": observation.T.tocsr(),
+        "n_states": observation.shape[1],
+        "n_actions": len(transitions),
+        "n_obs": observation.shape[0],
+    }
+
+
+def from_dense(T, O):
+    """Convert dense Simulation 1.py arrays, T (S, S, A) and O (O, S), to a sparse model."""
+    return sparse_model([T[:, :, a] for a in range(T.shape[2])], O)
+
+
+def _banded(n_rows, n_cols, bandwidth, rng):
+    """Random row-normalized CSR matrix whose row i only reaches columns near i * n_cols / n_rows (on a ring)."""
+    offsets = np.arange(-bandwidth, bandwidth + 1)
+    centre = np.arange(n_rows) * n_cols // n_rows
+    cols = (centre[:, None] + offsets[None, :]) % n_cols
+    data = rng.random(cols.shape)
+    data /= data.sum(axis=1, keepdims=True)
+    rows = np.repeat(np.arange(n_rows), len(offsets))
+    # Duplicate (row, col) pairs on small rings are summed, which keeps rows normalized
+    return sp.csr_matrix((data.ravel(), (rows, cols.ravel())), shape=(n_rows, n_cols))
+
+
+def random_local_model(n_states, n_actions, n_obs, bandwidth=2, rng=None):
+    """Random locally connected model: states only move to, and are only seen as, nearby indices."""
+    rng = np.random if rng is None else rng
+    transitions = [_banded(n_states, n_states, bandwidth, rng) for _ in range(n_actions)]
+    observation_by_state = _banded(n_states, n_obs, bandwidth, rng)
+    return sparse_model(transitions, observation_by_state.T)
+
+
+def sample_sparse_row(matrix, row, rng=None):
+    """Draw a column index from one row of a row-normalized CSR matrix."""
+    rng = np.random if rng is None else rng
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    cdf = np.cumsum(matrix.data[start:end])
+    k = min(np.searchsorted(cdf, rng.random() * cdf[-1], side="right"), end - start - 1)
+    return matrix.indices[start + k]
+
+
+def sparse_belief_update(belief, observation, model, action):
+    """Posterior beliefs and free energy after taking action and seeing observation.
+
+    Uses the same prediction as Simulation 1.py, T_a @ belief, computed once and
+    shared by the free energy and the posterior.
+    """
+    predicted = model["transition"][action] @ belief
+    O = model["observation"]
+    start, end = O.indptr[observation], O.indptr[observation + 1]
+    states, likelihood = O.indices[start:end], O.data[start:end]
+
+    joint = likelihood * predicted[states]
+    evidence = joint.sum()
+    free_energy = -np.sum(belief * np.log(evidence + 1e-8))
+    posterior = np.zeros_like(belief)
+    posterior[states] = joint / evidence
+    return posterior, free_energy
+
+
+def calculate_free_energy(belief, observation, model, action):
+    """Free energy of Simulation 1.py from sparse products."""
+    predicted = model["observation"][observation] @ (model["transition"][action] @ belief)
+    return -np.sum(belief * np.log(predicted[0] + 1e-8))
+
+
+def simulate_sparse(model, T, rng=None, belief=None, state=None, record_beliefs=False):
+    """Run one agent for T steps on a sparse model, recording states, observations and free energy."""
+    rng = np.random if rng is None else rng
+    n_states = model["n_states"]
+    if belief is None:
+        belief = np.full(n_states, 1 / n_states)
+    if state is None:
+        state = int(rng.random() * n_states)
+
+    states_over_time = np.zeros(T, dtype=int)
+    observations_over_time = np.zeros(T, dtype=int)
+    free_energy_over_time = np.zeros(T)
+    beliefs_over_time = np.zeros((T, n_states)) if record_beliefs else None
+
+    for t in range(T):
+        action = int(rng.random() * model["n_actions"])
+        state = sample_sparse_row(model["transition"][action], state, rng)
+        observation = sample_sparse_row(model["observation_by_state"], state, rng)
+        belief, free_energy_over_time[t] = sparse_belief_update(belief, observation, model, action)
+
+        states_over_time[t] = state
+        observations_over_time[t] = observation
+        if record_beliefs:
+            beliefs_over_time[t] = belief
+
+    return {
+        "states": states_over_time,
+        "observations": observations_over_time,
+        "beliefs": beliefs_over_time,
+        "free_energy": free_energy_over_time,
+        "belief": belief,
+        "state": state,
+    }
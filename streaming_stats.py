@@ -0,0 +1,161 @@
+import numpy as np
+
+# Constant-memory summaries of VFE/EFE and belief trajectories across many runs.
+# A StreamingStats holds, for every cell of a fixed shape (e.g. time step x agent):
+# count, mean and M2 (Welford/Chan), min/max and a fixed-range histogram that
+# doubles as a quantile sketch. Runs can be fed one time step at a time or as
+# whole (runs, ...) batches, and aggregates from parallel workers merge exactly
+# (up to rounding) with merge(), in any order.
+#
+#   stats = StreamingStats((120,), value_range=(0.0, 2.0))
+#   for point in range(120):
+#       stats.update(vfe_of_every_match_at_point, index=point)
+#   stats.mean, stats.variance, stats.quantile(0.95)
+
+
+class StreamingStats:
+    """Running mean, variance, extrema, histogram and quantiles per cell of `shape`.
+
+    Values outside value_range are counted in an underflow/overflow bin on each side.
+    Without value_range, the range is fixed from the first batch, widened by `margin`
+    of its span on both sides; merged aggregates must share the same bin edges.
+    """
+
+    def __init__(self, shape, value_range=None, bins=128, margin=0.5):
+        self.shape = tuple(shape)
+        self.bins = bins
+        self.margin = margin
+        self.count = np.zeros(self.shape, dtype=np.int64)
+        self.mean = np.zeros(self.shape)
+        self.m2 = np.zeros(self.shape)
+        self.min = np.full(self.shape, np.inf)
+        self.max = np.full(self.shape, -np.inf)
+        self.histogram = np.zeros(self.shape + (bins + 2,), dtype=np.int64)
+        self.edges = None if value_range is None else np.linspace(*value_range, bins + 1)
+
+    def _set_range(self, values):
+        low, high = float(np.min(values)), float(np.max(values))
+        pad = (high - low) * self.margin or max(abs(low), 1.0) * self.margin
+        self.edges = np.linspace(low - pad, high + pad, self.bins + 1)
+
+    def update(self, values, index=None):
+        """Add a batch of observations: values is (batch, *shape), or (batch, *shape[k:]) for cells at index."""
+        values = np.asarray(values, dtype=float)
+        if self.edges is None:
+            self._set_range(values)
+        target = tuple(np.atleast_1d(index)) if index is not None else ()
+        n = len(values)
+
+        # Chan et al. combination of the batch moments with the running ones
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        count = self.count[target]
+        total = count + n
+        delta = batch_mean - self.mean[target]
+        self.mean[target] += delta * (n / total)
+        self.m2[target] += batch_m2 + delta ** 2 * (count * n / total)
+        self.count[target] = total
+        self.min[target] = np.minimum(self.min[target], values.min(axis=0))
+        self.max[target] = np.maximum(self.max[target], values.max(axis=0))
+
+        # One bincount over (cell, bin) pairs updates every histogram at once
+        hist = self.histogram[target]
+        n_cells = batch_mean.size
+        bin_index = np.searchsorted(self.edges, values.reshape(n, n_cells), side="right")
+        flat = (np.arange(n_cells) * (self.bins + 2) + bin_index).ravel()
+        hist += np.bincount(flat, minlength=n_cells * (self.bins + 2)).reshape(hist.shape)
+        self.histogram[target] = hist
+
+    def merge(self, other):
+        """Fold another aggregate of the same shape and bins into this one."""
+        if other.edges is None:
+            return self
+        if self.edges is None:
+            self.edges = other.edges.copy()
+        elif not np.array_equal(self.edges, other.edges):
+            raise ValueError("cannot merge aggregates with different histogram ranges")
+        total = self.count + other.count
+        safe_total = np.maximum(total, 1)
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / safe_total
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / safe_total
+        self.count = total
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.histogram += other.histogram
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1); NaN where fewer than two observations were seen."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def quantile(self, q):
+        """Quantiles from the histograms, interpolated linearly within a bin: shape (*q.shape, *shape).
+
+        Accuracy is one bin width inside value_range. The outer bins are bounded by the
+        observed min and max.
+        """
+        q = np.asarray(q, dtype=float)
+        if self.edges is None:
+            return np.full(q.shape + self.shape, np.nan)
+        cumulative = np.cumsum(self.histogram, axis=-1)
+        # Bin b spans [lower[b], upper[b]]; the outer bins end at the observed extremes
+        lower = np.concatenate([np.broadcast_to(self.min[..., None], self.shape + (1,)),
+                                np.broadcast_to(self.edges, self.shape + (self.bins + 1,))], axis=-1)
+        upper = np.concatenate([np.broadcast_to(self.edges, self.shape + (self.bins + 1,)),
+                                np.broadcast_to(self.max[..., None], self.shape + (1,))], axis=-1)
+        with np.errstate(invalid="ignore"):
+            lower = np.clip(lower, self.min[..., None], self.max[..., None])
+            upper = np.clip(upper, self.min[..., None], self.max[..., None])
+
+        results = np.empty(q.shape + self.shape)
+        flat_cumulative = cumulative.reshape(-1, self.bins + 2)
+        flat_lower, flat_upper = lower.reshape(flat_cumulative.shape), upper.reshape(flat_cumulative.shape)
+        for qi, value in np.ndenumerate(q):
+            rank = value * flat_cumulative[:, -1]
+            b = (flat_cumulative < rank[:, None]).sum(axis=1)
+            b = np.minimum(b, self.bins + 1)
+            rows = np.arange(len(b))
+            below = np.where(b > 0, flat_cumulative[rows, b - 1], 0)
+            in_bin = flat_cumulative[rows, b] - below
+            fraction = np.where(in_bin > 0, (rank - below) / np.maximum(in_bin, 1), 0.0)
+            quantiles = flat_lower[rows, b] + fraction * (flat_upper[rows, b] - flat_lower[rows, b])
+            results[qi] = np.where(flat_cumulative[:, -1] > 0, quantiles, np.nan).reshape(self.shape)
+        return results
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        """Dict of per-cell arrays: count, mean, std, min, max and the requested quantiles."""
+        summary = {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min, "max": self.max}
+        for q, values in zip(quantiles, self.quantile(quantiles)):
+            summary[f"q{q:g}"] = values
+        return summary
+
+
+def merge_all(aggregates):
+    """Merge a sequence of {name: StreamingStats} dicts into the first one."""
+    aggregates = list(aggregates)
+    merged = aggregates[0]
+    for aggregate in aggregates[1:]:
+        for name, stats in aggregate.items():
+            merged[name].merge(stats)
+    return merged
+
+
+def aggregate_results(results, value_ranges=None, bins=128, aggregate=None):
+    """Aggregate a results dict of (runs, ...) arrays, e.g. from simulate_matches or run_parallel.
+
+    value_ranges maps field name -> (low, high). Pass an earlier aggregate to keep adding to it.
+    """
+    value_ranges = value_ranges or {}
+    if aggregate is None:
+        aggregate = {name: StreamingStats(values.shape[1:], value_ranges.get(name), bins)
+                     for name, values in results.items()}
+    for name, stats in aggregate.items():
+        stats.update(results[name])
+    return aggregate
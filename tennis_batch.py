@@ -0,0 +1,257 @@
+import numpy as np
+
+from belief_filter import BeliefFilter, log_table, reduce_last
+from tennis_tables import (
+    OBSERVATION_INDEX, TOTAL_POINTS, actions, build_model_tables, context_code, efe_cost_table, fatigue_bucket,
+    hidden_states, sample_from_cdf,
+)
+from tennis_planning import exact_planning_batch
+from tennis_profiling import NULL_PROFILER
+from trajectory_recorder import TrajectoryRecorder, load_recording
+
+# Batched Monte Carlo engine for the tennis model in Tennis_simulation_8.py.
+# Every function works on N matches at once: beliefs are (N, 5) arrays,
+# states/actions/observations are (N,) integer arrays indexing the lists in tennis_tables.
+
+# Action selection of simulate_matches: sampled rollouts (multi_step_planning_batch) or
+# the exact expected-free-energy tree search of tennis_planning.py
+PLANNERS = ["sampled", "exact"]
+WIN = OBSERVATION_INDEX["win"]
+
+
+def sample_categorical(probs, rng=None):
+    """Draw one index per row of an (N, K) probability array."""
+    return sample_from_cdf(np.cumsum(probs, axis=1), rng)
+
+
+def match_tables(models):
+    """Stack build_model_tables dicts into the per-model arrays the batch functions index by model.
+
+    Both players are modelled in the "neutral" player state. Besides the likelihood and
+    transition CDFs, the filter's log-likelihood and the -log(likelihood + 1e-5) weights
+    of the VFE are kept as rows per observation, (models, points, observation, state).
+    The models must share the match length and the fatigue increments.
+    """
+    likelihood = np.stack([tables["likelihood"][:, 0] for tables in models])
+    return {
+        "total_points": models[0]["total_points"],
+        "likelihood": likelihood,
+        "likelihood_cdf": np.cumsum(likelihood, axis=-1),
+        "log_likelihood_rows": np.ascontiguousarray(log_table(likelihood).swapaxes(2, 3)),
+        "vfe_weight_rows": np.ascontiguousarray(-log_table(likelihood, 1e-5).swapaxes(2, 3)),
+        "transition_cdf": np.stack([tables["transition_cdf"] for tables in models]),
+        "fatigue_increment": models[0]["fatigue_increment"],
+        "fatigue_levels": models[0]["transition_cdf"].shape[0] - 1,
+    }
+
+
+def state_transition_batch(tables, model, current_states, fatigue, opponent_actions, context, rng=None):
+    """Sample the next hidden state of every match; fatigue in fatigue buckets, context as codes."""
+    return sample_from_cdf(tables["transition_cdf"][model, fatigue, opponent_actions, context, current_states], rng)
+
+
+def generate_observation_batch(tables, model, point, states, rng=None):
+    """Sample one observation per match from the likelihood rows of its hidden state."""
+    return sample_from_cdf(tables["likelihood_cdf"][model, point, states], rng)
+
+
+def update_fatigue_batch(tables, fatigue, action, context):
+    """Fatigue bucket of every match after the given actions."""
+    return np.minimum(fatigue + tables["fatigue_increment"][action, context], tables["fatigue_levels"])
+
+
+def compute_vfe_batch(belief_filter, tables, model, point, observation, out, work):
+    """Update every match's beliefs with its observation and write the VFE into out (N, 1).
+
+    The rows of every match are gathered into work (N, 5), so the update allocates nothing.
+    """
+    log_likelihood_rows = tables["log_likelihood_rows"]
+    n_obs, n_states = log_likelihood_rows.shape[2:]
+    rows = (model * tables["total_points"] + point) * n_obs + observation
+    np.take(log_likelihood_rows.reshape(-1, n_states), rows, axis=0, out=work)
+    belief_filter.step(work)
+    np.take(tables["vfe_weight_rows"].reshape(-1, n_states), rows, axis=0, out=work)
+    work *= belief_filter.belief
+    return reduce_last(np.add, work, out)
+
+
+def efe_cost(observation_likelihood, preferences):
+    """Per-state expected free energy, so that EFE(beliefs) = beliefs @ efe_cost."""
+    return efe_cost_table(observation_likelihood, preferences)
+
+
+def compute_efe_batch(beliefs, observation_likelihood, preferences):
+    """Compute expected free energy for every match."""
+    return beliefs @ efe_cost(observation_likelihood, preferences)
+
+
+def multi_step_planning_batch(beliefs, observation_likelihood, preferences, horizon=3, rng=None, cost=None):
+    """Sampled rollout planning of multi_step_planning, run for all matches at once.
+
+    observation_likelihood is shared (5, 4) or per match (n, 5, 4), and so is cost, the
+    per-state EFE of efe_cost ((5,) or (n, 5); computed from preferences if None).
+    Rollouts are held state-major, (state, action, match), so the sums over the five
+    states and the observation CDF add whole arrays instead of reducing a short axis.
+    """
+    rng = np.random if rng is None else rng
+    if cost is None:
+        cost = efe_cost(observation_likelihood, preferences)
+    n_matches, n_states = beliefs.shape
+    n_actions, n_obs = len(actions), observation_likelihood.shape[-1]
+    # Contiguous (state, observation, match) and (state, 1, match) copies, shared tables broadcast
+    likelihood = np.ascontiguousarray(np.moveaxis(np.broadcast_to(observation_likelihood,
+                                                                  (n_matches, n_states, n_obs)), 0, -1))
+    cost = np.ascontiguousarray(np.moveaxis(np.broadcast_to(cost, (n_matches, n_states)), 0, -1))[:, None]
+    rows = likelihood.reshape(n_states, -1)  # Row (observation * n_matches + match) per state
+    matches = np.arange(n_matches)
+    simulated_beliefs = np.broadcast_to(beliefs.T[:, None], (n_states, n_actions, n_matches))
+    cumulative_efe = np.zeros((n_actions, n_matches))
+    for _ in range(horizon):
+        # Observation CDF of every rollout, then one comparison count per rollout as in cdf_sample
+        cdf = np.einsum("som,sam->oam", likelihood, simulated_beliefs)
+        for o in range(1, n_obs):
+            cdf[o] += cdf[o - 1]
+        threshold = rng.random(n_actions * n_matches).reshape(n_actions, n_matches) * cdf[-1]
+        simulated_observation = np.minimum((cdf <= threshold).sum(axis=0), n_obs - 1)
+
+        joint = np.take(rows, simulated_observation * n_matches + matches, axis=1) * simulated_beliefs
+        simulated_beliefs = joint / joint.sum(axis=0)
+        cumulative_efe += (simulated_beliefs * cost).sum(axis=0)
+
+    # argmin keeps the first action on ties, like the strict comparison of multi_step_planning
+    return np.argmin(cumulative_efe, axis=0)
+
+
+def match_recorder(directory, n_matches, total_points=TOTAL_POINTS, decimation=1, chunk_steps=1024):
+    """TrajectoryRecorder for the per-point VFE/EFE of n_matches matches, for simulate_matches(recorder=...)."""
+    fields = {f"{player}_{quantity}": ((n_matches,), float)
+              for player in ("player1", "player2") for quantity in ("vfe", "efe")}
+    return TrajectoryRecorder(directory, fields, total_points, decimation, chunk_steps)
+
+
+def simulate_matches(n_matches, total_points=TOTAL_POINTS, preferences=None, initial_fatigue=0.1,
+                     horizon=3, match_context="normal", rng=None, tables=None, profiler=None, recorder=None,
+                     planner="sampled", model=None, cost=None):
+    """Simulate n_matches independent matches and return per-match VFE/EFE trajectories and points won.
+
+    planner "exact" picks every action by the deterministic tree search, given the
+    player's fatigue and the opponent's action on the previous point.
+
+    For matches between different players, tables is a match_tables() stack and model
+    the (2, n_matches) model slots of both sides in it; cost replaces the EFE cost of
+    preferences by each side's own, (2, n_matches, total_points, 5), and initial_fatigue
+    may be given per side as (2, n_matches). Only the sampled planner takes these.
+
+    Pass a tennis_profiling.PhaseProfiler as profiler to time the phases of the point loop.
+    With a recorder from match_recorder() the trajectories are streamed to disk point by
+    point instead of held in memory, and returned as memory-mapped (n_matches, rows) views.
+    """
+    if planner not in PLANNERS:
+        raise ValueError(f"unknown planner {planner!r}; choose from {PLANNERS}")
+    if planner == "exact" and (model is not None or cost is not None):
+        raise ValueError("the exact planner plays every match on one model and one set of preferences")
+    rng = np.random if rng is None else rng
+    profiler = NULL_PROFILER if profiler is None else profiler
+    profiler.annotate(n_matches=n_matches, total_points=total_points, horizon=horizon, match_context=match_context,
+                      planner=planner)
+    if preferences is None:
+        preferences = np.array([0.5, 0.2, 0.2, 0.1])
+    if tables is None:
+        tables = build_model_tables(total_points)
+    n_states = len(hidden_states)
+
+    if model is None:
+        batch = match_tables([tables])
+        slots = np.zeros((2, n_matches), dtype=int)
+    else:
+        batch, slots = tables, np.asarray(model)
+    likelihood = batch["likelihood"]
+    if cost is None:
+        model_cost = efe_cost_table(likelihood, preferences)
+    context = np.broadcast_to(context_code(match_context), (n_matches,))
+
+    filters = [BeliefFilter((n_matches, n_states)) for _ in range(2)]
+    beliefs = [belief_filter.belief for belief_filter in filters]
+    vfe_work = np.empty((n_matches, n_states))
+    fatigue = list(np.broadcast_to(fatigue_bucket(initial_fatigue), (2, n_matches)))
+    chosen = [np.full(n_matches, -1) for _ in range(2)]  # No opponent action before the first point
+    # With a recorder only the current point is kept in memory
+    columns = total_points if recorder is None else 1
+    vfe = np.zeros((2, n_matches, columns))
+    efe = np.zeros((2, n_matches, columns))
+    points_won = np.zeros((2, n_matches), dtype=int)
+
+    for point in range(total_points):
+        column = point if recorder is None else 0
+        with profiler.phase("likelihood"):
+            # One shared table when every match runs on the same model, else each side's rows
+            if model is None:
+                point_likelihood = [likelihood[0, point]] * 2
+            else:
+                point_likelihood = [likelihood[slots[p], point] for p in range(2)]
+            if cost is not None:
+                point_cost = [cost[p, :, point] for p in range(2)]
+            elif model is None:
+                point_cost = [model_cost[0, point]] * 2
+            else:
+                point_cost = [model_cost[slots[p], point] for p in range(2)]
+
+        with profiler.phase("planning"):
+            if planner == "exact":
+                chosen = [exact_planning_batch(beliefs[p], point_likelihood[p], preferences, horizon,
+                                               fatigue[p] / batch["fatigue_levels"], chosen[1 - p], match_context)
+                          for p in range(2)]
+            else:
+                chosen = [multi_step_planning_batch(beliefs[p], point_likelihood[p], preferences, horizon, rng,
+                                                    point_cost[p]) for p in range(2)]
+
+        for p in range(2):
+            with profiler.phase("transition"):
+                current_states = (rng.random(n_matches) * n_states).astype(int)
+                state = state_transition_batch(batch, slots[p], current_states, fatigue[p], chosen[1 - p], context,
+                                               rng)
+            with profiler.phase("observation"):
+                obs = generate_observation_batch(batch, slots[p], point, state, rng)
+                points_won[p] += obs == WIN
+            with profiler.phase("vfe"):
+                compute_vfe_batch(filters[p], batch, slots[p], point, obs, vfe[p, :, column, None], vfe_work)
+            with profiler.phase("efe"):
+                np.multiply(beliefs[p], point_cost[p], out=vfe_work)
+                reduce_last(np.add, vfe_work, efe[p, :, column, None])
+
+        with profiler.phase("fatigue"):
+            for p in range(2):
+                fatigue[p] = update_fatigue_batch(batch, fatigue[p], chosen[p], context)
+
+        if recorder is not None:
+            recorder.record(point, player1_vfe=vfe[0, :, 0], player2_vfe=vfe[1, :, 0],
+                            player1_efe=efe[0, :, 0], player2_efe=efe[1, :, 0])
+
+    results = {
+        "player1_vfe": vfe[0],
+        "player2_vfe": vfe[1],
+        "player1_efe": efe[0],
+        "player2_efe": efe[1],
+        "player1_beliefs": beliefs[0],
+        "player2_beliefs": beliefs[1],
+        "player1_fatigue": fatigue[0] / batch["fatigue_levels"],
+        "player2_fatigue": fatigue[1] / batch["fatigue_levels"],
+        "player1_points_won": points_won[0],
+        "player2_points_won": points_won[1],
+    }
+    if recorder is not None:
+        recorder.close()
+        results.update({key: value.T for key, value in load_recording(recorder.directory).items()})
+    return results
+
+
+if __name__ == "__main__":
+    import time
+
+    n_matches = 10000
+    start = time.perf_counter()
+    results = simulate_matches(n_matches)
+    elapsed = time.perf_counter() - start
+    print(f"{n_matches} matches in {elapsed:.2f}s ({n_matches / elapsed:.0f} matches/s)")
+    print(f"Mean final VFE: {results['player1_vfe'][:, -1].mean():.4f} / {results['player2_vfe'][:, -1].mean():.4f}")
+    print(f"Mean final EFE: {results['player1_efe'][:, -1].mean():.4f} / {results['player2_efe'][:, -1].mean():.4f}")
@@ -0,0 +1,204 @@
+from pathlib import Path
+
+import numpy as np
+
+from tennis_tables import (
+    BASE_OBSERVATION_PROBS, BASE_TRANSITION_PROBS, FATIGUE_BUCKETS, OBSERVATION_INDEX, TOTAL_POINTS, actions,
+    build_model_tables, hidden_states, match_contexts,
+)
+
+# Baum-Welch fitting of the tennis model from recorded point outcomes.
+# A match log is the sequence of observation codes (index into tennis_tables.observations)
+# of one player's points; logs are stored as an (n_matches, n_points) integer array padded
+# with -1, in memory or as .npy files that are memory-mapped and read batch by batch.
+# The hidden-state HMM has an initial distribution, one transition matrix and an
+# observation matrix per bin of points (point_bins=1 ties them across the whole match).
+# Every EM iteration is one pass over the logs: a scaled forward-backward, with its
+# normalizers accumulated in log space, runs on a whole batch of sequences at once and
+# only the expected counts are kept.
+#
+#   fit = fit_hmm("season.npy", point_bins=12)
+#   tables = tables_from_fit(fit)            # same layout as build_model_tables()
+#   simulate_matches(1000, tables=tables)
+
+PADDING = -1
+
+
+def encode_logs(logs):
+    """Pad lists of observation names (or codes) into an (n_matches, n_points) int8 array."""
+    length = max(len(log) for log in logs)
+    encoded = np.full((len(logs), length), PADDING, dtype=np.int8)
+    for i, log in enumerate(logs):
+        encoded[i, :len(log)] = [OBSERVATION_INDEX.get(o, o) for o in log]
+    return encoded
+
+
+def iter_batches(source, batch_size=4096):
+    """Yield (batch, n_points) code arrays from an array, a .npy path or a list of either."""
+    sources = source if isinstance(source, (list, tuple)) else [source]
+    for item in sources:
+        logs = np.load(item, mmap_mode="r") if isinstance(item, (str, Path)) else np.asarray(item)
+        for start in range(0, len(logs), batch_size):
+            yield np.asarray(logs[start:start + batch_size], dtype=np.int64)
+
+
+def point_bin_index(n_points, point_bins, total_points=TOTAL_POINTS):
+    """Observation-matrix bin of every point; points past total_points share the last bin."""
+    return np.minimum(np.arange(n_points) * point_bins // total_points, point_bins - 1)
+
+
+def forward_backward(logs, initial, transition, observation, total_points=TOTAL_POINTS):
+    """Scaled forward-backward for a batch of padded logs, time-major.
+
+    Every step is normalized and its normalizer c_t kept in log space, so
+    log alpha_t = log alpha_hat_t + sum(log c_1..t) never underflows, however long the
+    match. Returns alpha_hat, beta_hat (T, N, S), log c (T, N) and emission probabilities
+    (T, N, S); the posteriors are alpha_hat * beta_hat and the log-likelihood sum(log c).
+    Padded points emit with probability 1, so they change neither the likelihood nor
+    the posteriors of the observed points.
+    """
+    n, n_points = logs.shape
+    logs = logs.T
+    valid = logs != PADDING
+    bins = point_bin_index(n_points, len(observation), total_points)
+    emission = observation[bins[:, None], :, np.where(valid, logs, 0)]
+    emission[~valid] = 1.0
+
+    n_states = len(initial)
+    ones = np.ones(n_states)
+    alpha = np.empty((n_points, n, n_states))
+    beta = np.empty((n_points, n, n_states))
+    scale = np.empty((n_points, n))
+    step = initial * emission[0]
+    for t in range(n_points):
+        if t:
+            step = (alpha[t - 1] @ transition) * emission[t]
+        scale[t] = step @ ones
+        alpha[t] = step / scale[t][:, None]
+    beta[-1] = 1.0
+    for t in range(n_points - 2, -1, -1):
+        beta[t] = ((emission[t + 1] * beta[t + 1]) @ transition.T) / scale[t + 1][:, None]
+    return alpha, beta, np.log(scale), emission
+
+
+def expected_counts(logs, initial, transition, observation, total_points=TOTAL_POINTS):
+    """E-step of one batch: expected initial, transition and per-bin observation counts."""
+    n, n_points = logs.shape
+    alpha, beta, log_scale, emission = forward_backward(logs, initial, transition, observation, total_points)
+    valid = (logs != PADDING).T
+    gamma = alpha * beta
+
+    # sum over matches and points of xi_t = alpha_hat_t[i] A[i, j] emission_t+1[j] beta_hat_t+1[j] / c_t+1,
+    # as one matmul over the flattened (point, match) axis
+    n_states = len(initial)
+    left = alpha[:-1].reshape(-1, n_states)
+    right = (emission[1:] * beta[1:] * (valid[1:] / np.exp(log_scale[1:]))[..., None]).reshape(-1, n_states)
+    transition_counts = transition * (left.T @ right)
+
+    # gamma summed per (point, state, observation), then per bin of points
+    one_hot = (logs.T[..., None] == np.arange(observation.shape[-1])) & valid[..., None]
+    per_point = gamma.transpose(0, 2, 1) @ one_hot.astype(float)
+    bins = point_bin_index(n_points, len(observation), total_points)
+    observation_counts = np.zeros_like(observation)
+    np.add.at(observation_counts, bins, per_point)
+
+    return {
+        "initial": gamma[0].sum(axis=0),
+        "transition": transition_counts,
+        "observation": observation_counts,
+        "log_likelihood": log_scale.sum(),
+        "points": valid.sum(),
+    }
+
+
+def _normalize_counts(counts, smoothing):
+    counts = counts + smoothing
+    return counts / counts.sum(axis=-1, keepdims=True)
+
+
+def fit_hmm(source, point_bins=1, n_iter=100, tol=1e-6, batch_size=4096, smoothing=1e-3,
+            total_points=TOTAL_POINTS, initial=None, transition=None, observation=None, verbose=False):
+    """Fit the tennis HMM to match logs by Baum-Welch.
+
+    source is anything iter_batches() accepts. Parameters start from the hand-set tables
+    of tennis_tables.py unless given. Iterates until the mean log-likelihood per point
+    improves by less than tol. smoothing is a pseudo-count added to every expected count.
+    Returns a dict with initial (5,), transition (5, 5), observation (point_bins, 5, 4),
+    total_points and the log-likelihood history.
+    """
+    n_states = len(hidden_states)
+    initial = np.full(n_states, 1 / n_states) if initial is None else np.asarray(initial, dtype=float)
+    transition = BASE_TRANSITION_PROBS if transition is None else transition
+    transition = _normalize_counts(np.asarray(transition, dtype=float), smoothing)
+    if observation is None:
+        observation = BASE_OBSERVATION_PROBS
+    observation = np.broadcast_to(observation, (point_bins,) + BASE_OBSERVATION_PROBS.shape).astype(float)
+    observation = _normalize_counts(observation, smoothing)
+
+    history = []
+    for iteration in range(n_iter):
+        totals = None
+        for batch in iter_batches(source, batch_size):
+            counts = expected_counts(batch, initial, transition, observation, total_points)
+            totals = counts if totals is None else {key: totals[key] + counts[key] for key in counts}
+
+        history.append(totals["log_likelihood"] / totals["points"])
+        if verbose:
+            print(f"iteration {iteration}: log-likelihood per point {history[-1]:.6f}")
+        initial = _normalize_counts(totals["initial"], smoothing)
+        transition = _normalize_counts(totals["transition"], smoothing)
+        observation = _normalize_counts(totals["observation"], smoothing)
+        if len(history) > 1 and history[-1] - history[-2] < tol:
+            break
+
+    return {
+        "initial": initial,
+        "transition": transition,
+        "observation": observation,
+        "total_points": total_points,
+        "log_likelihood": np.array(history),
+    }
+
+
+def tables_from_fit(fit, total_points=None):
+    """Model tables for simulate_matches(tables=...) with the fitted likelihoods and transitions.
+
+    The fitted matrices replace the hand-set ones for every player state, fatigue level,
+    opponent action and match context; fatigue still accumulates as in update_fatigue.
+    """
+    total_points = total_points or int(fit["total_points"])
+    observation = np.asarray(fit["observation"])
+    bins = point_bin_index(total_points, len(observation), int(fit["total_points"]))
+    likelihood = np.broadcast_to(observation[bins][:, None], (total_points, 2) + observation.shape[1:])
+    transition = np.broadcast_to(fit["transition"], (FATIGUE_BUCKETS, len(actions), len(match_contexts))
+                                 + np.shape(fit["transition"]))
+    return build_model_tables(total_points, likelihood=np.ascontiguousarray(likelihood),
+                              transition=np.ascontiguousarray(transition))
+
+
+def save_fit(path, fit):
+    np.savez(path, **fit)
+
+
+def load_tables(path, total_points=None):
+    """Model tables from a fit saved with save_fit()."""
+    with np.load(path) as saved:
+        return tables_from_fit(dict(saved), total_points)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Fit the tennis model to logged point outcomes.")
+    parser.add_argument("logs", nargs="+", help=".npy files of (matches, points) observation codes, -1 padded")
+    parser.add_argument("--output", default="tennis_fit.npz")
+    parser.add_argument("--point-bins", type=int, default=1, help="observation matrices per match")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fit = fit_hmm(args.logs, args.point_bins, args.iterations, batch_size=args.batch_size, verbose=True)
+    print(f"Fitted in {time.perf_counter() - start:.2f}s")
+    save_fit(args.output, fit)
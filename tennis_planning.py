@@ -0,0 +1,141 @@
+import numpy as np
+
+from tennis_tables import (
+    CONTEXT_FACTORS, INTERACTION_FACTORS, actions, context_code, efe_cost_table, fatigue_increments,
+    transition_matrices,
+)
+
+# Exact expected-free-energy policy search for the tennis model.
+# The action x observation tree is expanded level by level up to the horizon.
+# Nodes whose (rounded) beliefs and fatigue repeat are merged, so the tree
+# grows with the number of distinct beliefs instead of (6 * 4) ** horizon.
+# A player's own action only changes its fatigue, which shapes the transitions
+# of the following points; actions with the same fatigue effect share a subtree.
+# The transitions are those of state_transition (tennis_tables.transition_matrices),
+# also when the match itself runs on fitted tables.
+
+
+_HASH_MULTIPLIERS = np.array([
+    0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9,
+    0xD6E8FEB86659FD93, 0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x27D4EB2F165667C5,
+], dtype=np.uint64).view(np.int64)
+
+
+def interaction_factor(opponent_action=None):
+    """Opponent interaction factor of state_transition; the mean over actions when the opponent is unknown."""
+    if opponent_action is None:
+        return INTERACTION_FACTORS.mean()
+    if isinstance(opponent_action, str):
+        opponent_action = actions.index(opponent_action)
+    return INTERACTION_FACTORS[opponent_action]
+
+
+def _predict(beliefs, fatigue, opponent_action, match_context):
+    """Push every node's beliefs through the transition matrix of its fatigue level."""
+    levels, level_index = np.unique(fatigue, return_inverse=True)
+    transitions = transition_matrices(levels, interaction_factor(opponent_action),
+                                      CONTEXT_FACTORS[context_code(match_context)])
+    predicted = np.empty_like(beliefs)
+    for k, transition in enumerate(transitions):
+        at_level = level_index == k
+        predicted[at_level] = beliefs[at_level] @ transition
+    return predicted
+
+
+def _merge_nodes(beliefs, fatigue, decimals):
+    """Merge nodes with equal rounded beliefs and fatigue; return representatives and inverse index."""
+    keys = np.column_stack([
+        np.round(beliefs * 10 ** decimals),
+        np.round(fatigue * 1e6),
+    ]).astype(np.int64)
+    # Sort on a 64-bit hash of each key and fall back to a full lexicographic sort on collisions
+    hashes = keys @ _HASH_MULTIPLIERS[:keys.shape[1]]
+    _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    if np.any(keys != keys[first][inverse]):
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return beliefs[first], fatigue[first], inverse.reshape(-1)
+
+
+def expected_free_energy_tree(beliefs, observation_likelihood, preferences, horizon=3, fatigue=0.1,
+                              opponent_action=None, match_context="normal", decimals=4, tolerance=0.0):
+    """Expected cumulative EFE of every action at the root of the action x observation tree.
+
+    Beliefs are merged after rounding to `decimals` places. Branches whose reach probability
+    times their value range is at most `tolerance` are not expanded and take the midpoint of
+    their bounds; tolerance=0 expands every branch.
+    """
+    cost = efe_cost_table(observation_likelihood, preferences)
+    cost_min, cost_max = cost.min(), cost.max()
+    increments, action_group = np.unique(fatigue_increments(match_context), return_inverse=True)
+
+    node_beliefs = np.asarray(beliefs, dtype=float)[None, :]
+    node_fatigue = np.array([fatigue], dtype=float)
+    node_reach = np.ones(1)
+    levels = []
+
+    for depth in range(horizon):
+        remaining = horizon - depth - 1
+        predicted = _predict(node_beliefs, node_fatigue, opponent_action, match_context)
+        n_nodes, n_groups = len(predicted), len(increments)
+        child_fatigue = np.minimum(1.0, node_fatigue[:, None] + increments[None, :])
+        q_beliefs, q_fatigue, q_index = _merge_nodes(
+            np.repeat(predicted, n_groups, axis=0), child_fatigue.reshape(-1), decimals)
+        q_reach = np.zeros(len(q_beliefs))
+        np.maximum.at(q_reach, q_index, np.repeat(node_reach, n_groups))
+        level = {"q_index": q_index.reshape(n_nodes, n_groups), "step": q_beliefs @ cost}
+
+        if remaining > 0:
+            expand = q_reach * remaining * (cost_max - cost_min) > tolerance
+            obs_probs = q_beliefs[expand] @ observation_likelihood
+            posterior = q_beliefs[expand][:, None, :] * observation_likelihood.T[None, :, :]
+            posterior /= obs_probs[:, :, None]
+            n_obs = obs_probs.shape[1]
+            node_beliefs, node_fatigue, v_index = _merge_nodes(
+                posterior.reshape(-1, posterior.shape[2]), np.repeat(q_fatigue[expand], n_obs), decimals)
+            node_reach = np.zeros(len(node_beliefs))
+            np.maximum.at(node_reach, v_index, (q_reach[expand][:, None] * obs_probs).reshape(-1))
+            level.update(expand=expand, obs_probs=obs_probs, v_index=v_index.reshape(-1, n_obs),
+                         bound=remaining * 0.5 * (cost_min + cost_max))
+        levels.append(level)
+
+    # Backward pass: Q = step EFE + expected value of the children, V = min over actions
+    values = None
+    for level in reversed(levels):
+        q_values = level["step"].copy()
+        if values is not None:
+            q_values += level["bound"]
+            q_values[level["expand"]] += np.sum(level["obs_probs"] * values[level["v_index"]], axis=1) - level["bound"]
+        group_values = q_values[level["q_index"]]
+        values = group_values.min(axis=1)
+
+    return group_values[0][action_group]
+
+
+def exact_multi_step_planning(beliefs, opponent_beliefs, observation_likelihood, preferences, horizon=3, fatigue=0.1,
+                              opponent_action=None, match_context="normal", decimals=4, tolerance=0.0):
+    """Deterministic drop-in for multi_step_planning: the action with the lowest expected cumulative EFE."""
+    action_values = expected_free_energy_tree(beliefs, observation_likelihood, preferences, horizon, fatigue,
+                                              opponent_action, match_context, decimals, tolerance)
+    return actions[int(np.argmin(action_values))]
+
+
+def exact_planning_batch(beliefs, observation_likelihood, preferences, horizon=3, fatigue=0.1, opponent_actions=None,
+                         match_context="normal", decimals=4, tolerance=0.0):
+    """exact_multi_step_planning for every match of a batch: action indices (N,).
+
+    fatigue (N,) and opponent_actions (N,) are per match; an opponent action of -1 (or
+    None for all) is unknown. Matches with equal rounded beliefs, fatigue and opponent
+    action share one tree, so a batch costs one search per distinct situation.
+    """
+    n_matches = len(beliefs)
+    fatigue = np.broadcast_to(np.asarray(fatigue, dtype=float), (n_matches,))
+    opponent_actions = np.broadcast_to(-1 if opponent_actions is None else opponent_actions, (n_matches,))
+    keys = np.column_stack([np.round(beliefs * 10 ** decimals), np.round(fatigue * 1e6), opponent_actions])
+    _, first, inverse = np.unique(keys.astype(np.int64), axis=0, return_index=True, return_inverse=True)
+    chosen = np.empty(len(first), dtype=int)
+    for k, i in enumerate(first):
+        opponent_action = None if opponent_actions[i] < 0 else int(opponent_actions[i])
+        action_values = expected_free_energy_tree(beliefs[i], observation_likelihood, preferences, horizon, fatigue[i],
+                                                  opponent_action, match_context, decimals, tolerance)
+        chosen[k] = np.argmin(action_values)
+    return chosen[inverse.reshape(-1)]
@@ -0,0 +1,178 @@
+import csv
+import json
+import time
+import tracemalloc
+from pathlib import Path
+
+# Opt-in per-phase instrumentation of the tennis point loop (tennis_batch.simulate_matches).
+# The loop wraps each phase in `with profiler.phase(name):`; without a profiler it gets
+# NULL_PROFILER, whose phases are a shared no-op context manager.
+#
+#   profiler = PhaseProfiler(track_allocations=True)
+#   simulate_match(horizon=5, profiler=profiler)
+#   profiler.to_json("match.json"); profiler.to_csv("match.csv")
+
+# Phases of the point loop in loop order; reports list them in this order, other phases after them
+PHASES = ["likelihood", "planning", "transition", "observation", "vfe", "efe", "fatigue"]
+
+
+class _NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class NullProfiler:
+    """Profiler used when instrumentation is off; every call is a no-op."""
+    enabled = False
+    _phase = _NullPhase()
+
+    def phase(self, name):
+        return self._phase
+
+    def annotate(self, **metadata):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class _Phase:
+    def __init__(self, track_allocations):
+        self.track_allocations = track_allocations
+        self.calls = 0
+        self.seconds = 0.0
+        self.net_bytes = 0
+        self.peak_bytes = 0
+
+    def __enter__(self):
+        if self.track_allocations:
+            tracemalloc.reset_peak()
+            self._memory = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._start
+        self.calls += 1
+        if self.track_allocations:
+            current, peak = tracemalloc.get_traced_memory()
+            self.net_bytes += current - self._memory
+            self.peak_bytes = max(self.peak_bytes, peak - self._memory)
+        return False
+
+
+class PhaseProfiler:
+    """Wall-clock time, call count and (optionally) traced memory per phase.
+
+    With track_allocations, peak_bytes is the largest rise of traced memory within one
+    call, temporaries included, and net_bytes the memory all calls left allocated
+    (negative if they freed more than they kept). tracemalloc does not count
+    allocations, so neither is an allocation count. Tracking starts tracemalloc, which
+    slows the loop down noticeably; the timings of such a run include that overhead.
+    Phases must not be nested.
+    """
+    enabled = True
+
+    def __init__(self, track_allocations=False):
+        self.track_allocations = track_allocations
+        self.phases = {}
+        self.metadata = {}
+        self._started_tracing = False
+
+    def phase(self, name):
+        phase = self.phases.get(name)
+        if phase is None:
+            if self.track_allocations and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            phase = self.phases[name] = _Phase(self.track_allocations)
+        return phase
+
+    def annotate(self, **metadata):
+        """Attach run parameters (horizon, match length, ...) to the report."""
+        self.metadata.update(metadata)
+
+    def stop(self):
+        """Stop tracemalloc if this profiler started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self):
+        """Per-phase totals with each phase's share of the instrumented time, in PHASES order."""
+        total = sum(phase.seconds for phase in self.phases.values())
+        order = sorted(self.phases, key=lambda name: PHASES.index(name) if name in PHASES else len(PHASES))
+        rows = []
+        for name in order:
+            phase = self.phases[name]
+            row = {
+                "phase": name,
+                "calls": phase.calls,
+                "seconds": phase.seconds,
+                "seconds_per_call": phase.seconds / phase.calls if phase.calls else 0.0,
+                "share": phase.seconds / total if total else 0.0,
+            }
+            if self.track_allocations:
+                row["peak_bytes"] = phase.peak_bytes
+                row["net_bytes"] = phase.net_bytes
+            rows.append(row)
+        return {"metadata": dict(self.metadata), "total_seconds": total, "phases": rows}
+
+    def to_json(self, path):
+        Path(path).write_text(json.dumps(self.report(), indent=2))
+
+    def to_csv(self, path):
+        rows = self.report()["phases"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["phase"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def summary(self):
+        lines = []
+        for row in self.report()["phases"]:
+            line = f"{row['phase']:<12} {row['calls']:>7} calls {row['seconds'] * 1e3:>10.2f} ms {row['share']:>7.1%}"
+            if self.track_allocations:
+                line += f" {row['peak_bytes'] / 1024:>10.1f} KiB peak {row['net_bytes'] / 1024:>10.1f} KiB net"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from Tennis_simulation_8 import TOTAL_POINTS, simulate_match
+
+    parser = argparse.ArgumentParser(description="Profile the phases of a simulated tennis match.")
+    parser.add_argument("--horizon", type=int, nargs="+", default=[3], help="planning horizons to profile")
+    parser.add_argument("--points", type=int, nargs="+", default=[TOTAL_POINTS], help="match lengths to profile")
+    parser.add_argument("--allocations", action="store_true", help="also trace peak and net memory (slower)")
+    parser.add_argument("--json", default=None, help="write the reports of every run as one JSON list")
+    parser.add_argument("--csv", default=None, help="write one CSV row per run and phase")
+    args = parser.parse_args()
+
+    reports = []
+    for horizon in args.horizon:
+        for points in args.points:
+            profiler = PhaseProfiler(track_allocations=args.allocations)
+            simulate_match(points, horizon=horizon, profiler=profiler)
+            profiler.stop()
+            print(f"horizon={horizon} points={points}")
+            print(profiler.summary())
+            reports.append(profiler.report())
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, indent=2))
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = None
+            for report in reports:
+                for row in report["phases"]:
+                    row = {**report["metadata"], **row}
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
@@ -0,0 +1,133 @@
+import numpy as np
+
+from categorical_sampler import cdf_sample
+
+# Compact, integer-coded representation of the tennis model in Tennis_simulation_8.py.
+# States, actions, observations and match contexts are referred to by their index in
+# the lists below. Likelihoods are precomputed for every point of the match and
+# transitions for every (fatigue bucket, opponent action, match context), so the
+# match loop only indexes arrays.
+
+NUM_SETS = 3
+AVG_MINUTES_PER_SET = 40
+MINUTES_PER_POINT = 1
+TOTAL_POINTS = AVG_MINUTES_PER_SET * NUM_SETS // MINUTES_PER_POINT
+
+hidden_states = ["aggressive", "defensive", "neutral", "tired", "focused"]
+actions = ["serve", "return", "smash", "drop shot", "lob", "volley"]
+observations = ["win", "lose", "forced error", "unforced error"]
+match_contexts = ["normal", "high pressure"]
+
+STATE_INDEX = {state: i for i, state in enumerate(hidden_states)}
+ACTION_INDEX = {action: i for i, action in enumerate(actions)}
+OBSERVATION_INDEX = {observation: i for i, observation in enumerate(observations)}
+CONTEXT_INDEX = {context: i for i, context in enumerate(match_contexts)}
+
+# Base tables of update_observation_likelihoods and state_transition, rows in hidden_states order
+BASE_OBSERVATION_PROBS = np.array([
+    [0.6, 0.2, 0.1, 0.1],
+    [0.4, 0.3, 0.2, 0.1],
+    [0.5, 0.2, 0.2, 0.1],
+    [0.3, 0.4, 0.2, 0.1],
+    [0.7, 0.1, 0.1, 0.1],
+])
+BASE_TRANSITION_PROBS = np.array([
+    [0.5, 0.2, 0.1, 0.1, 0.1],
+    [0.2, 0.5, 0.2, 0.1, 0.0],
+    [0.3, 0.3, 0.2, 0.1, 0.1],
+    [0.1, 0.2, 0.2, 0.4, 0.1],
+    [0.4, 0.2, 0.2, 0.1, 0.1],
+])
+
+# Actions that count as aggressive for fatigue and opponent interaction ("serve", "smash")
+AGGRESSIVE_ACTIONS = np.array([action in ["smash", "serve"] for action in actions])
+# Opponent interaction factor of every action and context factor of every match context
+INTERACTION_FACTORS = np.where(AGGRESSIVE_ACTIONS, 0.1, 0.05)
+CONTEXT_FACTORS = np.array([0.05, 0.1])
+
+# Fatigue moves in steps of 0.01, so a 0.01 grid over [0, 1] represents it exactly
+FATIGUE_BUCKETS = 101
+
+
+def fatigue_bucket(fatigue):
+    """Index of the fatigue grid cell holding each fatigue level."""
+    return np.rint(np.asarray(fatigue) * (FATIGUE_BUCKETS - 1)).astype(int)
+
+
+def context_code(match_context):
+    """Integer code of a match context label, or of an array of labels."""
+    return (np.asarray(match_context) == "high pressure").astype(int)
+
+
+def likelihood_table(total_points=TOTAL_POINTS):
+    """Observation likelihoods for every point and player state: (total_points, 2, 5, 4).
+
+    The second axis is 0 for any player state and 1 for "tired", matching the
+    state_factor of update_observation_likelihoods.
+    """
+    match_progress = np.arange(total_points) / total_points
+    adjustment = 0.1 * (match_progress / total_points)
+    state_factor = np.array([0.05, 0.1])
+    adjusted = (BASE_OBSERVATION_PROBS
+                + adjustment[:, None, None, None] * (0.5 - BASE_OBSERVATION_PROBS)
+                - state_factor[None, :, None, None])
+    adjusted = np.maximum(0, adjusted)
+    return adjusted / adjusted.sum(axis=3, keepdims=True)
+
+
+def transition_matrices(fatigue, interaction_factor, context_factor):
+    """Transition matrices of state_transition, (..., 5, 5), for broadcastable arrays of the three factors."""
+    fatigue, interaction_factor, context_factor = (np.asarray(factor, dtype=float)[..., None, None]
+                                                   for factor in (fatigue, interaction_factor, context_factor))
+    n_states = BASE_TRANSITION_PROBS.shape[0]
+    adjusted = BASE_TRANSITION_PROBS * (1 - fatigue) + interaction_factor * fatigue / n_states + context_factor
+    return adjusted / adjusted.sum(axis=-1, keepdims=True)
+
+
+def transition_table():
+    """Transition probabilities of state_transition: (fatigue bucket, opponent action, context, state, next state)."""
+    fatigue = np.linspace(0, 1, FATIGUE_BUCKETS)[:, None, None]
+    return transition_matrices(fatigue, INTERACTION_FACTORS[None, :, None], CONTEXT_FACTORS[None, None, :])
+
+
+def fatigue_increment_table():
+    """Fatigue increase of update_fatigue, in fatigue buckets: (action, context)."""
+    increase = 1 + 2 * AGGRESSIVE_ACTIONS[:, None] + np.array([0, 1])[None, :]
+    return increase.astype(int)
+
+
+def fatigue_increments(match_context="normal"):
+    """Fatigue increase of every action in a match context, as in update_fatigue."""
+    return fatigue_increment_table()[:, context_code(match_context)] / (FATIGUE_BUCKETS - 1)
+
+
+def build_model_tables(total_points=TOTAL_POINTS, likelihood=None, transition=None):
+    """Precompute every table the match loop needs, together with the CDFs used for sampling.
+
+    likelihood (total_points, 2, 5, 4) and transition (101, 6, 2, 5, 5) replace the
+    hand-set tables, e.g. with fitted ones from tennis_learning.py.
+    """
+    if likelihood is None:
+        likelihood = likelihood_table(total_points)
+    if transition is None:
+        transition = transition_table()
+    return {
+        "total_points": total_points,
+        "likelihood": likelihood,
+        "likelihood_cdf": np.cumsum(likelihood, axis=-1),
+        "transition": transition,
+        "transition_cdf": np.cumsum(transition, axis=-1),
+        "fatigue_increment": fatigue_increment_table(),
+    }
+
+
+def efe_cost_table(likelihood, preferences):
+    """Per-state expected free energy for every likelihood matrix in a stack."""
+    divergence = np.log(likelihood + 1e-5) - np.log(preferences + 1e-5)
+    return np.sum(likelihood * divergence, axis=-1)
+
+
+def sample_from_cdf(cdf, rng=None):
+    """Draw one index per row of an (N, K) array of cumulative probabilities."""
+    rng = np.random if rng is None else rng
+    return cdf_sample(cdf, rng.random(len(cdf)))
@@ -0,0 +1,251 @@
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from tennis_batch import match_tables, simulate_matches
+from tennis_tables import TOTAL_POINTS, build_model_tables, efe_cost_table
+
+# Tournaments and seasons of many players on the batched tennis engine.
+# Every player brings model tables (hand-set, or fitted with tennis_learning.py), outcome
+# preferences and a fatigue level that carries from one match to the next. A PlayerPool
+# stacks the tables of its distinct models once (tennis_batch.match_tables), so a batch
+# of matches between any players is one simulate_matches call gathering each side's rows.
+# Knockout draws are trees whose matches become ready as their two feeder matches
+# resolve; every batch plays all ready matches of all running tournaments at once, and
+# the next rounds are scheduled incrementally from the results.
+# A match is won by the player with more "win" observations; ties go to a coin flip.
+#
+#   pool = PlayerPool([make_player(f"p{i}") for i in range(128)])
+#   results = run_tournaments(pool, [np.arange(128)], rng=np.random.default_rng(0))
+#   results["champions"], results["report"]["matches_per_second"]
+
+DEFAULT_PREFERENCES = np.array([0.5, 0.2, 0.2, 0.1])
+BYE = -2
+UNDECIDED = -1
+
+
+@lru_cache(maxsize=None)
+def default_tables(total_points=TOTAL_POINTS):
+    """Hand-set model tables, shared by every player without tables of their own."""
+    return build_model_tables(total_points)
+
+
+@lru_cache(maxsize=None)
+def fitted_tables(path, total_points=None):
+    """Tables of a fit saved by tennis_learning.save_fit, loaded once per path."""
+    from tennis_learning import load_tables
+
+    return load_tables(path, total_points)
+
+
+def make_player(name, tables=None, preferences=None, fatigue=0.1):
+    """A player: model tables (default_tables() if None), outcome preferences and starting fatigue."""
+    return {
+        "name": name,
+        "tables": tables,
+        "preferences": DEFAULT_PREFERENCES if preferences is None else np.asarray(preferences, dtype=float),
+        "fatigue": fatigue,
+    }
+
+
+class PlayerPool:
+    """Players with their model tables stacked for batched matches and their carried fatigue.
+
+    Players sharing a tables dict share one model slot. A player starts their next match
+    with the fraction `carry_over` of the fatigue they finished the last one with.
+    """
+
+    def __init__(self, players, total_points=TOTAL_POINTS, carry_over=0.5):
+        self.players = list(players)
+        self.names = [player["name"] for player in self.players]
+        self.total_points = total_points
+        self.carry_over = carry_over
+        self.fatigue = np.array([player["fatigue"] for player in self.players], dtype=float)
+        self.matches_played = np.zeros(len(self.players), dtype=int)
+
+        # One slot per distinct tables dict, in order of first use
+        models, slots = [], {}
+        self.model_index = np.empty(len(self.players), dtype=int)
+        for i, player in enumerate(self.players):
+            tables = default_tables(total_points) if player["tables"] is None else player["tables"]
+            if tables["total_points"] != total_points:
+                raise ValueError(f"tables of {player['name']} are for {tables['total_points']} points, "
+                                 f"not {total_points}")
+            self.model_index[i] = slots.setdefault(id(tables), len(models))
+            if self.model_index[i] == len(models):
+                models.append(tables)
+
+        self.tables = match_tables(models)
+        # Preferences are per player, so the EFE costs are too: (players, points, states)
+        self.cost = np.stack([efe_cost_table(self.tables["likelihood"][slot], player["preferences"])
+                              for slot, player in zip(self.model_index, self.players)])
+
+    def play(self, first, second, rng=None, horizon=3, match_context="normal"):
+        """Play matches first[i] vs second[i] (player indices) as one batch and update fatigue.
+
+        A player must not appear twice in a batch. Returns per-match arrays: winner
+        (player index), points won and mean VFE/EFE of both sides.
+        """
+        rng = np.random if rng is None else rng
+        sides = np.array([first, second], dtype=int)
+        match = simulate_matches(sides.shape[1], self.total_points, initial_fatigue=self.fatigue[sides],
+                                 horizon=horizon, match_context=match_context, rng=rng, tables=self.tables,
+                                 model=self.model_index[sides], cost=self.cost[sides])
+        players = ("player1", "player2")
+        for player, side in zip(players, sides):
+            self.fatigue[side] = match[f"{player}_fatigue"] * self.carry_over
+            self.matches_played[side] += 1
+        points_won = np.stack([match[f"{player}_points_won"] for player in players], axis=1)
+        tie_break = rng.random(sides.shape[1]) < 0.5
+        first_wins = (points_won[:, 0] > points_won[:, 1]) | ((points_won[:, 0] == points_won[:, 1]) & tie_break)
+        return {
+            "winner": np.where(first_wins, sides[0], sides[1]),
+            "points_won": points_won,
+            "mean_vfe": np.stack([match[f"{player}_vfe"].mean(axis=1) for player in players], axis=1),
+            "mean_efe": np.stack([match[f"{player}_efe"].mean(axis=1) for player in players], axis=1),
+        }
+
+
+# Knockout scheduling
+def knockout_tree(entrants):
+    """Bracket of a draw as a heap: node k's match is between the winners of nodes 2k and 2k + 1.
+
+    Entrants fill the leaves in draw order, padded with byes to a power of two.
+    Returns the winner array, UNDECIDED at every match node.
+    """
+    size = 1 << (max(len(entrants), 1) - 1).bit_length()
+    winners = np.full(2 * size, UNDECIDED)
+    winners[size:] = BYE
+    winners[size:size + len(entrants)] = entrants
+    return winners
+
+
+def ready_matches(winners):
+    """Advance byes, then return the match nodes whose two players are known."""
+    ready = []
+    for node in range(len(winners) // 2 - 1, 0, -1):
+        if winners[node] != UNDECIDED:
+            continue
+        left, right = winners[2 * node], winners[2 * node + 1]
+        if left == UNDECIDED or right == UNDECIDED:
+            continue
+        if left == BYE or right == BYE:
+            winners[node] = right if left == BYE else left
+        else:
+            ready.append(node)
+    return ready
+
+
+def run_tournaments(pool, draws, rng=None, horizon=3, match_context="normal", max_batch=None):
+    """Play knockout tournaments concurrently, each given as a draw of player indices.
+
+    Every batch holds all ready matches of all tournaments (at most max_batch), skipping
+    matches of players already playing in the batch; later rounds are scheduled as
+    soon as their feeder matches have resolved. Returns the champions, every played
+    match in order and a throughput report.
+    """
+    rng = np.random if rng is None else rng
+    trees = [knockout_tree(np.asarray(draw, dtype=int)) for draw in draws]
+    played = {"tournament": [], "round": [], "first": [], "second": [], "winner": [], "points_won": [],
+              "mean_vfe": [], "mean_efe": []}
+    n_batches = 0
+    start = time.perf_counter()
+
+    while True:
+        batch, busy = [], set()
+        for t, winners in enumerate(trees):
+            for node in ready_matches(winners):
+                first, second = winners[2 * node], winners[2 * node + 1]
+                if first in busy or second in busy or (max_batch and len(batch) >= max_batch):
+                    continue
+                busy.update((first, second))
+                batch.append((t, node, first, second))
+        if not batch:
+            break
+        tournament, node, first, second = (np.array(column) for column in zip(*batch))
+        results = pool.play(first, second, rng, horizon, match_context)
+        for t, k, winner in zip(tournament, node, results["winner"]):
+            trees[t][k] = winner
+        n_batches += 1
+
+        played["tournament"].append(tournament)
+        # Round 1 is the first round of the draw, the final is round log2(draw size)
+        played["round"].append(np.array([(len(trees[t]) // 2).bit_length() - int(k).bit_length()
+                                         for t, k in zip(tournament, node)]))
+        played["first"].append(first)
+        played["second"].append(second)
+        for key in ("winner", "points_won", "mean_vfe", "mean_efe"):
+            played[key].append(results[key])
+
+    elapsed = time.perf_counter() - start
+    n_matches = sum(len(first) for first in played["first"])
+    played = {key: np.concatenate(value) if value else np.zeros(0) for key, value in played.items()}
+    return {
+        "champions": np.array([winners[1] for winners in trees]),
+        "matches": played,
+        "report": throughput_report(n_matches, n_matches * pool.total_points, elapsed, n_batches),
+    }
+
+
+def throughput_report(n_matches, n_points, elapsed, n_batches):
+    return {
+        "matches": n_matches,
+        "points": n_points,
+        "batches": n_batches,
+        "mean_batch": n_matches / max(n_batches, 1),
+        "seconds": elapsed,
+        "matches_per_second": n_matches / elapsed if elapsed else float("nan"),
+        "points_per_second": n_points / elapsed if elapsed else float("nan"),
+    }
+
+
+def run_season(pool, weeks, rng=None, horizon=3, match_context="normal", max_batch=None, verbose=False):
+    """Play a season: weeks is a list of lists of draws, each week's tournaments concurrently.
+
+    Fatigue carries over from week to week through the pool. Returns the per-week
+    results of run_tournaments and a report for the whole season.
+    """
+    rng = np.random if rng is None else rng
+    results = []
+    for week, draws in enumerate(weeks):
+        results.append(run_tournaments(pool, draws, rng, horizon, match_context, max_batch))
+        if verbose:
+            report = results[-1]["report"]
+            champions = ", ".join(pool.names[c] for c in results[-1]["champions"])
+            print(f"week {week + 1}: {report['matches']} matches, {report['matches_per_second']:.0f} matches/s, "
+                  f"champions {champions}")
+    reports = [week["report"] for week in results]
+    season = throughput_report(*(sum(report[key] for report in reports)
+                                 for key in ("matches", "points", "seconds", "batches")))
+    return {"weeks": results, "report": season}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulate a season of knockout tournaments.")
+    parser.add_argument("--players", type=int, default=256)
+    parser.add_argument("--draw-size", type=int, default=64, help="entrants per tournament")
+    parser.add_argument("--tournaments", type=int, default=4, help="concurrent tournaments per week")
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--points", type=int, default=TOTAL_POINTS, help="points per match")
+    parser.add_argument("--horizon", type=int, default=3)
+    parser.add_argument("--fits", nargs="*", default=[], help="tennis_learning fits, assigned to players in turn")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    fits = [fitted_tables(path, args.points) for path in args.fits]
+    players = [make_player(f"player {i}", fits[i % len(fits)] if fits else default_tables(args.points),
+                           preferences=rng.dirichlet(DEFAULT_PREFERENCES * 20))
+               for i in range(args.players)]
+    pool = PlayerPool(players, args.points)
+    # Every week the players are shuffled into disjoint draws
+    weeks = [np.array_split(rng.permutation(args.players)[:args.draw_size * args.tournaments], args.tournaments)
+             for _ in range(args.weeks)]
+    season = run_season(pool, weeks, rng, args.horizon, verbose=True)
+    report = season["report"]
+    print(f"Season: {report['matches']} matches in {report['seconds']:.2f}s "
+          f"({report['matches_per_second']:.0f} matches/s, {report['points_per_second']:.0f} points/s, "
+          f"mean batch {report['mean_batch']:.0f})")
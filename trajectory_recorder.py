@@ -0,0 +1,142 @@
+import json
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+# Chunked, memory-mapped recording of simulation trajectories.
+# Every field is one .npy file in the output directory, created at its final size
+# with np.lib.format.open_memmap and filled a chunk at a time, so memory use depends
+# on the chunk size rather than the horizon. Every `decimation`-th step is kept.
+# A checkpoint flushes the files and pickles the simulator state next to them, so an
+# interrupted run resumes from its last checkpoint:
+#
+#   recorder = TrajectoryRecorder("run", {"beliefs": ((9,), float)}, total_steps=10**8, decimation=100)
+#   for t in range(recorder.start_step, 10**8):
+#       ...
+#       recorder.record(t, beliefs=belief)
+#       if (t + 1) % 10**6 == 0:
+#           recorder.checkpoint(t + 1, state)
+#   recorder.close()
+
+METADATA_FILE = "recording.json"
+CHECKPOINT_FILE = "checkpoint.pkl"
+
+
+class TrajectoryRecorder:
+    """Record per-step fields into memory-mapped .npy files, chunk by chunk.
+
+    fields maps name -> (per-step shape, dtype). With resume=True an existing recording
+    is reopened at its last checkpoint; `start_step` and `state` tell the simulator
+    where to continue (step 0 and None for a new recording).
+    """
+
+    def __init__(self, directory, fields, total_steps, decimation=1, chunk_steps=65536, resume=False):
+        self.directory = Path(directory)
+        self.fields = {name: (tuple(shape), np.dtype(dtype)) for name, (shape, dtype) in fields.items()}
+        self.total_steps = total_steps
+        self.decimation = decimation
+        self.n_rows = -(-total_steps // decimation)
+        self.chunk_rows = max(chunk_steps // decimation, 1)
+        self.start_step = 0
+        self.state = None
+        self._checkpoint_step = 0
+
+        if resume and (self.directory / METADATA_FILE).exists():
+            self._reopen()
+        else:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.arrays = {name: np.lib.format.open_memmap(self.directory / f"{name}.npy", mode="w+", dtype=dtype,
+                                                           shape=(self.n_rows,) + shape)
+                           for name, (shape, dtype) in self.fields.items()}
+            self._write_metadata(rows=0, step=0)
+        self.rows = self._first_row(self.start_step)
+        self._buffers = {name: np.empty((self.chunk_rows,) + shape, dtype)
+                         for name, (shape, dtype) in self.fields.items()}
+        self._buffered = 0
+
+    def _first_row(self, step):
+        """Row of the first recorded step at or after `step`."""
+        return -(-step // self.decimation)
+
+    def _write_metadata(self, rows, step):
+        metadata = {
+            "fields": {name: {"shape": list(shape), "dtype": dtype.str} for name, (shape, dtype) in self.fields.items()},
+            "total_steps": self.total_steps,
+            "decimation": self.decimation,
+            "rows": rows,
+            "step": step,
+        }
+        temporary = self.directory / (METADATA_FILE + ".tmp")
+        temporary.write_text(json.dumps(metadata, indent=2))
+        os.replace(temporary, self.directory / METADATA_FILE)
+
+    def _reopen(self):
+        metadata = json.loads((self.directory / METADATA_FILE).read_text())
+        if metadata["total_steps"] != self.total_steps or metadata["decimation"] != self.decimation:
+            raise ValueError("cannot resume a recording with a different length or decimation")
+        self.arrays = {name: np.load(self.directory / f"{name}.npy", mmap_mode="r+") for name in self.fields}
+        checkpoint = self.directory / CHECKPOINT_FILE
+        if checkpoint.exists():
+            with open(checkpoint, "rb") as f:
+                saved = pickle.load(f)
+            self.start_step, self.state = saved["step"], saved["state"]
+            self._checkpoint_step = self.start_step
+
+    def record(self, step, **values):
+        """Store the fields of one step if it is kept by the decimation."""
+        if step % self.decimation:
+            return
+        row = self._buffered
+        for name, value in values.items():
+            self._buffers[name][row] = value
+        self._buffered += 1
+        if self._buffered == self.chunk_rows:
+            self.flush()
+
+    def record_block(self, start_step, **values):
+        """Store consecutive steps start_step, start_step + 1, ... given as (steps, ...) arrays."""
+        steps = len(next(iter(values.values())))
+        first = -start_step % self.decimation
+        if first >= steps:
+            return
+        kept = {name: value[first::self.decimation] for name, value in values.items()}
+        self.flush()
+        row = self._first_row(start_step)
+        n = len(next(iter(kept.values())))
+        for name, value in kept.items():
+            self.arrays[name][row:row + n] = value
+        self.rows = row + n
+
+    def flush(self):
+        """Write the buffered chunk into the memory-mapped files."""
+        if self._buffered:
+            for name, buffer in self._buffers.items():
+                self.arrays[name][self.rows:self.rows + self._buffered] = buffer[:self._buffered]
+            self.rows += self._buffered
+            self._buffered = 0
+        for array in self.arrays.values():
+            array.flush()
+
+    def checkpoint(self, step, state):
+        """Flush and save the simulator state to resume from `step` (the next step to simulate)."""
+        self.flush()
+        temporary = self.directory / (CHECKPOINT_FILE + ".tmp")
+        with open(temporary, "wb") as f:
+            pickle.dump({"step": step, "state": state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.directory / CHECKPOINT_FILE)
+        self._checkpoint_step = step
+        self._write_metadata(rows=self.rows, step=step)
+
+    def close(self):
+        self.flush()
+        self._write_metadata(rows=self.rows, step=self.total_steps if self.rows == self.n_rows else self._checkpoint_step)
+
+
+def load_recording(directory, mmap_mode="r"):
+    """Memory-mapped fields of a recording, cut to the rows written so far."""
+    directory = Path(directory)
+    metadata = json.loads((directory / METADATA_FILE).read_text())
+    return {name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)[:metadata["rows"]]
+            for name in metadata["fields"]}